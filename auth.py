@@ -1,42 +1,190 @@
+import asyncio
+import hashlib
+import secrets
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 from datetime import timedelta
 import jwt
 from passlib.context import CryptContext
 from fastapi import HTTPException, Depends
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
+from sqlalchemy import event, inspect, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
-from config import SECRET_KEY, ALGORITHM
-from database import get_db
+from config import (
+    SECRET_KEY, ALGORITHM, ACCESS_TOKEN_EXPIRE_MINUTES, ACCESS_TOKEN_EXPIRE_MINUTES_BY_ROLE,
+    REFRESH_TOKEN_EXPIRE_DAYS, AUTH_USER_CACHE_TTL_SECONDS, BCRYPT_ROUNDS,
+    PASSWORD_HASH_WORKERS, PASSWORD_HASH_USE_PROCESSES, PASSWORD_HASH_MAX_PENDING,
+)
+from database import get_async_db
 from models.user import User
+from models.refresh_token import RefreshToken
+from cache import user_cache
 from utils import get_local_now
+import metrics
 
 # Configuración
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# Los hashes con otro costo se marcan para re-hash al iniciar sesión
+pwd_context = CryptContext(
+    schemes=["bcrypt"],
+    deprecated="auto",
+    bcrypt__default_rounds=BCRYPT_ROUNDS,
+    bcrypt__min_rounds=BCRYPT_ROUNDS,
+    bcrypt__max_rounds=BCRYPT_ROUNDS,
+)
 security = HTTPBearer()
 
+# Ejecutor dedicado: bcrypt no ocupa el threadpool que atiende catálogo y ventas
+_hash_executor = (
+    ProcessPoolExecutor(max_workers=PASSWORD_HASH_WORKERS)
+    if PASSWORD_HASH_USE_PROCESSES
+    else ThreadPoolExecutor(max_workers=PASSWORD_HASH_WORKERS, thread_name_prefix="password-hash")
+)
+_pending_hashes = 0
+
 def verify_password(plain_password, hashed_password):
     return pwd_context.verify(plain_password, hashed_password)
 
+def verify_and_update_password(plain_password, hashed_password):
+    """(válida, nuevo_hash): nuevo_hash no es None si el hash usa otro costo"""
+    return pwd_context.verify_and_update(plain_password[:72], hashed_password)
+
 def get_password_hash(password: str):
     password = password[:72]  # bcrypt limit
     return pwd_context.hash(password)
 
+async def _run_password_job(func, *args):
+    """Ejecuta func en el ejecutor de hash; 503 si ya hay demasiados en espera"""
+    global _pending_hashes
+    if _pending_hashes >= PASSWORD_HASH_MAX_PENDING:
+        metrics.increment("password_hash_rejected")
+        raise HTTPException(
+            status_code=503,
+            detail="Too many login attempts in progress, please retry",
+            headers={"Retry-After": "1"}
+        )
+    _pending_hashes += 1
+    start = time.perf_counter()
+    try:
+        return await asyncio.get_running_loop().run_in_executor(_hash_executor, func, *args)
+    finally:
+        _pending_hashes -= 1
+        metrics.observe(f"password_hash.{func.__name__}", time.perf_counter() - start)
+
+async def verify_password_async(plain_password, hashed_password):
+    return await _run_password_job(verify_and_update_password, plain_password, hashed_password)
+
+async def get_password_hash_async(password: str):
+    return await _run_password_job(get_password_hash, password)
+
 def create_access_token(data: dict, expires_delta: timedelta = None):
     to_encode = data.copy()
     if expires_delta:
         expire = get_local_now() + expires_delta
     else:
-        expire = get_local_now() + timedelta(minutes=30)
+        expire = get_local_now() + timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
     
     to_encode.update({"exp": expire})
     return jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
 
+def access_token_lifetime(role: str) -> timedelta:
+    return timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES_BY_ROLE.get(role, ACCESS_TOKEN_EXPIRE_MINUTES))
+
+def hash_refresh_token(token: str) -> str:
+    return hashlib.sha256(token.encode("utf-8")).hexdigest()
+
+def issue_tokens(db: Session, user: User) -> dict:
+    """Access token con la duración del rol y un refresh token nuevo (queda pendiente el commit)"""
+    lifetime = access_token_lifetime(user.role)
+    refresh_token = secrets.token_urlsafe(48)
+    stored = RefreshToken(
+        user_id=user.id,
+        token_hash=hash_refresh_token(refresh_token),
+        expires_at=get_local_now() + timedelta(days=REFRESH_TOKEN_EXPIRE_DAYS)
+    )
+    db.add(stored)
+    db.flush()
+    return {
+        "access_token": create_access_token(data=user_token_claims(user), expires_delta=lifetime),
+        "token_type": "bearer",
+        "expires_in": int(lifetime.total_seconds()),
+        "refresh_token": refresh_token,
+        "refresh_token_id": stored.id,
+    }
+
+def revoke_refresh_tokens(db: Session, user_id: int):
+    """Revoca todas las sesiones activas del usuario"""
+    db.execute(
+        update(RefreshToken)
+        .where(RefreshToken.user_id == user_id, RefreshToken.revoked_at.is_(None))
+        .values(revoked_at=get_local_now())
+    )
+
+def user_token_claims(user: User) -> dict:
+    """Datos del usuario que viajan en el token (sub, id y rol)"""
+    return {"sub": user.username, "uid": user.id, "role": user.role}
+
+def invalidate_user(*usernames):
+    user_cache.delete(*usernames)
+
+@event.listens_for(User.username, "set", active_history=True)
+def _remember_previous_username(target, value, oldvalue, initiator):
+    if isinstance(oldvalue, str) and oldvalue != value:
+        inspect(target).info.setdefault("previous_usernames", set()).add(oldvalue)
+
+@event.listens_for(User, "after_update")
+@event.listens_for(User, "after_delete")
+def _collect_changed_user(mapper, connection, target):
+    # Cualquier cambio del usuario (desactivación, rol, nombre...) descarta su caché, pero
+    # recién al confirmar: antes otra petición podría volver a cachear la fila sin el cambio
+    previous = inspect(target).info.pop("previous_usernames", set())
+    session = inspect(target).session
+    if session is None:
+        invalidate_user(target.username, *previous)
+        return
+    session.info.setdefault("changed_usernames", set()).update({target.username, *previous})
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_changed_users(session):
+    # Liberar un savepoint no confirma nada todavía: se espera a la transacción principal
+    if session.in_nested_transaction():
+        return
+    usernames = session.info.pop("changed_usernames", None)
+    if usernames:
+        invalidate_user(*usernames)
+
+@event.listens_for(Session, "after_rollback")
+def _forget_changed_users(session):
+    # Los cambios no se guardaron: la caché sigue siendo válida (tras un savepoint se
+    # conservan, invalidar de más no hace daño)
+    if not session.in_nested_transaction():
+        session.info.pop("changed_usernames", None)
+
+async def _load_user(db: AsyncSession, username: str):
+    """Columnas del usuario, desde la caché si está activa o desde la BD"""
+    if AUTH_USER_CACHE_TTL_SECONDS > 0:
+        cached = user_cache.get(username)
+        if cached is not None:
+            return cached
+
+    user = (await db.execute(select(User).where(User.username == username))).scalars().first()
+    if user is None:
+        return None
+    columns = {column.key: getattr(user, column.key) for column in User.__table__.columns}
+    if AUTH_USER_CACHE_TTL_SECONDS > 0:
+        user_cache.set(username, columns)
+    return columns
+
 async def get_current_user(
     credentials: HTTPAuthorizationCredentials = Depends(security), 
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
+    return await authenticate_token(db, credentials.credentials)
+
+async def authenticate_token(db: AsyncSession, token: str) -> User:
+    """Usuario del access token; HTTPException 401/400 si no es válido (también para WebSockets)"""
     try:
-        token = credentials.credentials
         payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
         username: str = payload.get("sub")
         if username is None:
@@ -44,9 +192,14 @@ async def get_current_user(
     except jwt.PyJWTError:
         raise HTTPException(status_code=401, detail="Invalid authentication credentials")
     
-    user = db.query(User).filter(User.username == username).first()
-    if user is None:
+    columns = await _load_user(db, username)
+    if columns is None:
         raise HTTPException(status_code=401, detail="User not found")
-    if not user.is_active:
+    # Token emitido para otro usuario que tenía el mismo username
+    token_user_id = payload.get("uid")
+    if token_user_id is not None and token_user_id != columns["id"]:
+        raise HTTPException(status_code=401, detail="Invalid authentication credentials")
+    if not columns["is_active"]:
         raise HTTPException(status_code=400, detail="Inactive user")
-    return user
\ No newline at end of file
+    # Instancia transitoria (no ligada a la sesión): solo para leer sus datos
+    return User(**columns)
@@ -0,0 +1,138 @@
+# benchmark_async.py
+# Compara la capacidad de lecturas concurrentes por el camino sync (rutas def con Session,
+# en el threadpool) y por el async (rutas async def con AsyncSession, ver database.py).
+# Ambos caminos ejecutan las mismas consultas (listado de productos, dashboard y categorías)
+# con el pool y los hilos configurados en config.py, sobre una base SQLite temporal.
+# Requiere httpx (requirements-dev.txt).
+#
+# Uso: python benchmark_async.py                   (concurrencia 50 y 200, 2000 peticiones)
+#      python benchmark_async.py --concurrency 100 --requests 5000
+
+import argparse
+import asyncio
+import collections
+import os
+import tempfile
+import time
+
+PATHS = ("sync", "async")
+READS = ("products", "dashboard", "categories")
+
+
+def percentile(values: list, fraction: float) -> float:
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * fraction))] * 1000 if values else 0.0
+
+
+def benchmark_router():
+    """Las mismas lecturas en una ruta def (Session) y en una async def (AsyncSession)"""
+    from fastapi import APIRouter, Depends
+    from sqlalchemy import case, func, select
+    from sqlalchemy.ext.asyncio import AsyncSession
+    from sqlalchemy.orm import Session
+    from auth import get_current_user
+    from database import ReadSessionLocal, get_async_db
+    from models.category import Category
+    from models.product import Product
+
+    queries = {
+        "products": lambda: select(Product.id, Product.name, Product.price, Product.stock)
+        .where(Product.is_active == True).order_by(Product.name, Product.id).limit(20),  # noqa: E712
+        "dashboard": lambda: select(
+            func.count(Product.id), func.coalesce(func.sum(case((Product.stock < 10, 1), else_=0)), 0)
+        ).where(Product.is_active == True),  # noqa: E712
+        "categories": lambda: select(Category.id, Category.name).order_by(Category.name),
+    }
+    router = APIRouter(prefix="/benchmark", dependencies=[Depends(get_current_user)])
+
+    def get_read_db():
+        # Sesión sync de solo lectura: en SQLite no toma el lock de escritura (ver database.py)
+        db = ReadSessionLocal()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    @router.get("/sync/{read}")
+    def sync_read(read: str, db: Session = Depends(get_read_db)):
+        return [list(row) for row in db.execute(queries[read]()).all()]
+
+    @router.get("/async/{read}")
+    async def async_read(read: str, db: AsyncSession = Depends(get_async_db)):
+        return [list(row) for row in (await db.execute(queries[read]())).all()]
+
+    return router
+
+
+async def run_level(client, headers: dict, path: str, concurrency: int, requests: int) -> str:
+    """Lecturas alternadas de READS por el camino dado, con `concurrency` a la vez"""
+    semaphore = asyncio.Semaphore(concurrency)
+    codes = collections.Counter()
+    times = []
+
+    async def read(index: int):
+        async with semaphore:
+            start = time.perf_counter()
+            try:
+                response = await client.get(f"/benchmark/{path}/{READS[index % len(READS)]}", headers=headers)
+                codes[response.status_code] += 1
+            except Exception:  # p. ej. tiempo de espera del pool agotado
+                codes["error"] += 1
+            times.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    await asyncio.gather(*[read(i) for i in range(requests)])
+    elapsed = time.perf_counter() - start
+    errors = sum(count for code, count in codes.items() if code != 200)
+    return (f"{path:<7} {concurrency:>6} {codes[200] / elapsed:>8.0f} {percentile(times, 0.5):>8.0f} "
+            f"{percentile(times, 0.99):>8.0f} {errors:>8}")
+
+
+async def run(concurrency_levels: list, requests: int):
+    import httpx
+    import migrate
+
+    migrate.upgrade(configure_logging=False)
+    import main
+
+    main.app.include_router(benchmark_router())
+    transport = httpx.ASGITransport(app=main.app, raise_app_exceptions=False)
+    async with main.app.router.lifespan_context(main.app):
+        async with httpx.AsyncClient(transport=transport, base_url="http://benchmark", timeout=120) as client:
+            user = {"email": "bench@paws.co", "username": "bench", "password": "bench",
+                    "full_name": "Benchmark", "role": "admin"}
+            await client.post("/auth/register", json=user)
+            login = await client.post("/auth/login", json={"username": "bench", "password": "bench"})
+            headers = {"Authorization": f"Bearer {login.json()['access_token']}"}
+            for i in range(5):
+                category = (await client.post("/categories/", json={"name": f"Categoría {i}"}, headers=headers)).json()
+                for j in range(100):
+                    await client.post("/products/", headers=headers, data={
+                        "name": f"Producto {i}-{j}", "price": "1", "stock": str(j), "category_id": str(category["id"]),
+                    })
+
+            print(f"{requests} lecturas por nivel ({', '.join(READS)}; latencias en ms)\n")
+            print(f"{'camino':<7} {'conc':>6} {'req/s':>8} {'p50':>8} {'p99':>8} {'errores':>8}")
+            for concurrency in concurrency_levels:
+                for path in PATHS:
+                    print(await run_level(client, headers, path, concurrency, requests), flush=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Lecturas concurrentes: rutas sync frente a async")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[50, 200], help="peticiones simultáneas")
+    parser.add_argument("--requests", type=int, default=2000, help="peticiones por nivel y camino")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        # Antes de importar la aplicación: config.py lee las variables al importar
+        os.environ.update(
+            DATABASE_URL=f"sqlite:///{os.path.join(directory, 'benchmark.db')}",
+            IMAGE_STORAGE_DIR=os.path.join(directory, "media"), BCRYPT_ROUNDS="4", CACHE_URL="",
+        )
+        os.environ.pop("ASYNC_DATABASE_URL", None)
+        asyncio.run(run(args.concurrency, args.requests))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+# benchmark_formats.py
+# Compara el tamaño en la red y el tiempo de codificación del catálogo en cada formato
+# de respuesta (ver formats.py) y con cada compresión (ver compression.py).
+#
+# Uso: python benchmark_formats.py                 (20000 productos de ejemplo)
+#      python benchmark_formats.py --count 50000
+
+import argparse
+import gzip
+import json
+import random
+import statistics
+import time
+from typing import List
+from pydantic import TypeAdapter
+from config import GZIP_LEVEL, BROTLI_QUALITY
+from schemas.product import ProductListItem
+import formats
+import storage
+
+try:
+    import brotli
+except ImportError:  # brotli es opcional
+    brotli = None
+
+COLUMNS = (
+    "id", "name", "description", "price", "cost", "stock", "barcode",
+    "unidad_medida", "category_id", "is_active", "image_hash", "image_url",
+)
+
+
+def sample_catalog(count: int) -> list:
+    """Filas como las que arma GET /products (todas las columnas)"""
+    rnd = random.Random(42)
+    words = ["Alimento", "Perro", "Gato", "Adulto", "Cachorro", "Arena", "Snack", "Juguete",
+             "Collar", "Correa", "Pollo", "Salmón", "Cordero", "Premium", "Light", "Mini"]
+    rows = []
+    for product_id in range(1, count + 1):
+        image_hash = "%064x" % rnd.getrandbits(256) if rnd.random() < 0.6 else None
+        rows.append({
+            "id": product_id,
+            "name": " ".join(rnd.choices(words, k=3)) + f" {rnd.choice([1, 2, 4, 8, 15])}kg",
+            "description": " ".join(rnd.choices(words, k=rnd.randint(0, 8))) or None,
+            "price": round(rnd.uniform(1000, 250000), 2),
+            "cost": round(rnd.uniform(500, 200000), 2),
+            "stock": rnd.randint(0, 300),
+            "barcode": str(rnd.randint(10**12, 10**13 - 1)),
+            "unidad_medida": rnd.choice(["unidad", "kg", "bolsa", None]),
+            "category_id": rnd.randint(1, 40),
+            "is_active": True,
+            "image_hash": image_hash,
+            "image_url": storage.image_url(product_id, image_hash),
+        })
+    return rows
+
+
+def timed(func, repeat: int):
+    """(resultado, mediana en ms)"""
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        times.append((time.perf_counter() - start) * 1000)
+    return result, statistics.median(times)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Tamaño y tiempo de codificación de cada formato")
+    parser.add_argument("--count", type=int, default=20000, help="productos en el catálogo de ejemplo")
+    parser.add_argument("--repeat", type=int, default=5, help="repeticiones por medición (se usa la mediana)")
+    args = parser.parse_args()
+
+    rows = sample_catalog(args.count)
+    # Lo que hace FastAPI con response_model: validar cada fila, serializar y json.dumps
+    list_adapter = TypeAdapter(List[ProductListItem])
+    encoders = {
+        "json (response_model)": lambda: json.dumps(
+            list_adapter.dump_python(list_adapter.validate_python(rows), mode="json", exclude_unset=True),
+            ensure_ascii=False, separators=(",", ":")
+        ).encode("utf-8"),
+        "json": lambda: formats.encode(rows, formats.JSON),
+        "columnar json": lambda: formats.encode(rows, formats.COLUMNAR_JSON, COLUMNS),
+    }
+    if formats.msgpack:
+        encoders["msgpack"] = lambda: formats.encode(rows, formats.MSGPACK)
+
+    print(f"Catálogo de {args.count} productos (mediana de {args.repeat} ejecuciones)\n")
+    print(f"{'formato':<22} {'encode ms':>10} {'bytes':>11} {'gzip':>10} {'gzip ms':>8} {'br':>10} {'br ms':>7}")
+    for name, encode in encoders.items():
+        body, encode_ms = timed(encode, args.repeat)
+        gzipped, gzip_ms = timed(lambda: gzip.compress(body, compresslevel=GZIP_LEVEL), args.repeat)
+        line = f"{name:<22} {encode_ms:>10.1f} {len(body):>11,} {len(gzipped):>10,} {gzip_ms:>8.1f}"
+        if brotli:
+            compressed, brotli_ms = timed(lambda: brotli.compress(body, quality=BROTLI_QUALITY), args.repeat)
+            line += f" {len(compressed):>10,} {brotli_ms:>7.1f}"
+        print(line)
+
+    print(f"\ngzip nivel {GZIP_LEVEL}" + (f", brotli calidad {BROTLI_QUALITY}" if brotli else ", brotli no instalado"))
+
+
+if __name__ == "__main__":
+    main()
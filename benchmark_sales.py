@@ -0,0 +1,130 @@
+# benchmark_sales.py
+# Compara el tiempo de serialización del listado de ventas (GET /sales): el camino anterior
+# (dict con UserSimple + validación de response_model + json.dumps de FastAPI) frente al
+# actual (dict plano serializado sin revalidar, ver routers/sales.py).
+#
+# Uso: python benchmark_sales.py                   (1000 y 10000 ventas de ejemplo)
+#      python benchmark_sales.py --counts 500 5000 --items 6
+
+import argparse
+import json
+import random
+import statistics
+import time
+from datetime import datetime, timedelta
+from typing import List
+from pydantic import TypeAdapter
+from models.product import Product
+from models.sale import Sale, SaleItem
+from models.user import User
+from schemas.sale import SaleWithUserResponse
+from schemas.user import UserSimple
+from routers.sales import _sale_response
+import formats
+
+
+def sample_sales(count: int, items_per_sale: int) -> list:
+    """Ventas en memoria con usuario e items cargados, como las devuelve la consulta"""
+    rnd = random.Random(42)
+    users = [User(id=i, username=f"cajero{i}", full_name=f"Cajero {i}", email=f"cajero{i}@paws.co")
+             for i in range(1, 6)]
+    products = [Product(id=i, name=f"Producto {i}") for i in range(1, 501)]
+    start = datetime(2026, 1, 1, 8, 0)
+    sales = []
+    for sale_id in range(1, count + 1):
+        items = []
+        for item_id in range(items_per_sale):
+            product = rnd.choice(products)
+            quantity, price = rnd.randint(1, 5), round(rnd.uniform(1000, 90000), 2)
+            items.append(SaleItem(id=sale_id * items_per_sale + item_id, product_id=product.id, product=product,
+                                  quantity=quantity, price=price, subtotal=quantity * price))
+        subtotal = sum(item.subtotal for item in items)
+        sales.append(Sale(
+            id=sale_id, total=subtotal, subtotal=subtotal, tax=0.0, discount=0.0,
+            payment_method=rnd.choice(["cash", "card", "transfer"]), customer_name=None,
+            customer_email=None, notes=None, client_sale_id=None,
+            created_at=start + timedelta(minutes=sale_id), user=rnd.choice(users), items=items,
+        ))
+    return sales
+
+
+def previous_sale_response(sale: Sale) -> dict:
+    """El dict que armaban get_sales/get_sale antes, con un UserSimple por venta"""
+    return {
+        "id": sale.id,
+        "total": sale.total,
+        "subtotal": sale.subtotal,
+        "tax": sale.tax,
+        "discount": sale.discount,
+        "payment_method": sale.payment_method,
+        "customer_name": sale.customer_name,
+        "customer_email": sale.customer_email,
+        "notes": sale.notes,
+        "client_sale_id": sale.client_sale_id,
+        "created_at": sale.created_at,
+        "user": UserSimple(
+            id=sale.user.id,
+            username=sale.user.username,
+            full_name=sale.user.full_name,
+            email=sale.user.email
+        ) if sale.user else None,
+        "items": [
+            {
+                "id": item.id,
+                "product_id": item.product_id,
+                "quantity": item.quantity,
+                "price": item.price,
+                "subtotal": item.subtotal,
+                "product_name": item.product.name if item.product else None
+            }
+            for item in sale.items
+        ]
+    }
+
+
+def timed(func, repeat: int):
+    """(resultado, mediana en ms)"""
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        times.append((time.perf_counter() - start) * 1000)
+    return result, statistics.median(times)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serialización del listado de ventas: anterior frente a actual")
+    parser.add_argument("--counts", type=int, nargs="+", default=[1000, 10000], help="ventas por medición")
+    parser.add_argument("--items", type=int, default=4, help="items por venta")
+    parser.add_argument("--repeat", type=int, default=5, help="repeticiones por medición (se usa la mediana)")
+    args = parser.parse_args()
+
+    # Lo que hace FastAPI con response_model: validar, serializar y json.dumps
+    list_adapter = TypeAdapter(List[SaleWithUserResponse])
+    paths = {
+        "anterior (response_model)": lambda sales: json.dumps(
+            list_adapter.dump_python(
+                list_adapter.validate_python([previous_sale_response(sale) for sale in sales]), mode="json"
+            ),
+            ensure_ascii=False, separators=(",", ":")
+        ).encode("utf-8"),
+        "actual (sin revalidar)": lambda sales: formats.encode(
+            [_sale_response(sale) for sale in sales], formats.JSON
+        ),
+    }
+
+    print(f"Ventas con {args.items} items (mediana de {args.repeat} ejecuciones)\n")
+    print(f"{'camino':<28} {'ventas':>7} {'ms':>9} {'bytes':>12}")
+    for count in args.counts:
+        sales = sample_sales(count, args.items)
+        bodies = []
+        for name, serialize in paths.items():
+            body, elapsed_ms = timed(lambda: serialize(sales), args.repeat)
+            bodies.append(body)
+            print(f"{name:<28} {count:>7} {elapsed_ms:>9.1f} {len(body):>12,}")
+        # Mismo contenido en ambos caminos
+        assert json.loads(bodies[0]) == json.loads(bodies[1])
+
+
+if __name__ == "__main__":
+    main()
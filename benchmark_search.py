@@ -0,0 +1,106 @@
+# benchmark_search.py
+# Compara la latencia de GET /products?search= con el índice FTS5 (ver search.py) frente
+# a LIKE '%término%' sobre un catálogo de ejemplo en una base SQLite temporal.
+#
+# Uso: python benchmark_search.py                  (100000 productos de ejemplo)
+#      python benchmark_search.py --count 20000
+
+import argparse
+import os
+import random
+import statistics
+import tempfile
+import time
+from sqlalchemy import create_engine, insert, select
+from models.category import Category
+from models.product import Product
+import search
+
+# Términos típicos de la caja: prefijos al escribir, acentos, varias palabras y código de barras
+TERMS = ["ali", "alimento", "salmon", "salmón cach", "correa roja", "arena gato 8", "770000000123"]
+PAGE_SIZE = 50
+
+
+def seed(engine, count: int):
+    """Catálogo con nombres en español (con tildes), descripción y código de barras"""
+    rnd = random.Random(42)
+    words = ["Alimento", "Perro", "Gato", "Adulto", "Cachorro", "Arena", "Snack", "Juguete",
+             "Collar", "Correa", "Pollo", "Salmón", "Cordero", "Premium", "Light", "Mini",
+             "Roja", "Azul", "Hueso", "Pelota", "Champú", "Cepillo", "Transportadora", "Cama"]
+    with engine.begin() as connection:
+        connection.execute(insert(Category.__table__), [
+            {"id": category_id, "name": f"Categoría {category_id}", "revision": 1}
+            for category_id in range(1, 41)
+        ])
+        rows = [{
+            "id": product_id,
+            "name": " ".join(rnd.choices(words, k=3)) + f" {rnd.choice([1, 2, 4, 8, 15])}kg",
+            "description": " ".join(rnd.choices(words, k=rnd.randint(0, 8))) or None,
+            "price": round(rnd.uniform(1000, 250000), 2),
+            "stock": rnd.randint(0, 300),
+            "barcode": str(7700000000000 + product_id),
+            "category_id": rnd.randint(1, 40),
+            "is_active": True,
+            "revision": 1,
+        } for product_id in range(1, count + 1)]
+        connection.execute(insert(Product.__table__), rows)
+
+
+def like_query(term: str):
+    """La búsqueda anterior: Product.name.contains(term), sin ranking"""
+    return (select(Product.id, Product.name)
+            .where(Product.is_active == True, Product.name.contains(term))  # noqa: E712
+            .order_by(Product.name, Product.id).limit(PAGE_SIZE))
+
+
+def indexed_query(term: str):
+    """La búsqueda actual: apply_search con el backend activo, ordenada por relevancia"""
+    query = select(Product.id, Product.name).where(Product.is_active == True)  # noqa: E712
+    query, rank = search.apply_search(query, term)
+    return query.order_by(rank, Product.id).limit(PAGE_SIZE)
+
+
+def timed(connection, query, repeat: int):
+    """(filas, mediana en ms)"""
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        rows = connection.execute(query).all()
+        times.append((time.perf_counter() - start) * 1000)
+    return len(rows), statistics.median(times)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Latencia de búsqueda de productos: FTS5 frente a LIKE")
+    parser.add_argument("--count", type=int, default=100000, help="productos en el catálogo de ejemplo")
+    parser.add_argument("--repeat", type=int, default=20, help="repeticiones por término (se usa la mediana)")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        engine = create_engine(f"sqlite:///{os.path.join(directory, 'benchmark.db')}")
+        Category.__table__.create(engine)
+        Product.__table__.create(engine)
+        # Con el índice creado antes de cargar, los triggers lo mantienen como en producción
+        with engine.begin() as connection:
+            search.create_search_index(connection)
+        start = time.perf_counter()
+        seed(engine, args.count)
+        print(f"Catálogo de {args.count} productos cargado en {time.perf_counter() - start:.1f} s "
+              f"(mediana de {args.repeat} ejecuciones, páginas de {PAGE_SIZE})\n")
+
+        with engine.connect() as connection:
+            if search.detect_backend(connection) != "sqlite_fts5":
+                raise SystemExit("Este SQLite no tiene FTS5")
+            print(f"{'término':<16} {'LIKE ms':>9} {'filas':>6} {'FTS5 ms':>9} {'filas':>6}")
+            for term in TERMS:
+                like_rows, like_ms = timed(connection, like_query(term), args.repeat)
+                fts_rows, fts_ms = timed(connection, indexed_query(term), args.repeat)
+                print(f"{term:<16} {like_ms:>9.2f} {like_rows:>6} {fts_ms:>9.2f} {fts_rows:>6}")
+        engine.dispose()
+
+    print("\nLIKE solo busca en el nombre y distingue tildes (salmon no encuentra Salmón); "
+          "FTS5 busca por prefijo en nombre, descripción y código de barras")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+# benchmark_sqlite.py
+# Mide ventas por segundo y latencias con ventas concurrentes sobre SQLite, sin y con el modo
+# de producción (pragmas WAL y un único escritor, ver database.py). Cada modo corre en un
+# proceso aparte con su propia base temporal, porque config.py lee las variables al importar.
+# Requiere httpx (requirements-dev.txt).
+#
+# Uso: python benchmark_sqlite.py                  (concurrencia 20 y 100, 600 peticiones)
+#      python benchmark_sqlite.py --concurrency 50 --requests 1000
+
+import argparse
+import asyncio
+import collections
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+
+# Variables de cada modo: "antes" es SQLite sin pragmas ni escritor único
+MODES = {
+    "antes": {"SQLITE_TUNING": "false", "SQLITE_SINGLE_WRITER": "false"},
+    "después": {"SQLITE_TUNING": "true", "SQLITE_SINGLE_WRITER": "true"},
+}
+
+
+def percentile(values: list, fraction: float) -> float:
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * fraction))] * 1000 if values else 0.0
+
+
+async def run_level(client, headers: dict, product_ids: list, concurrency: int, requests: int):
+    """Mitad ventas (POST /sales/) y mitad lecturas del dashboard, con `concurrency` a la vez"""
+    semaphore = asyncio.Semaphore(concurrency)
+    codes = collections.Counter()
+    sale_times, read_times = [], []
+
+    async def sale():
+        async with semaphore:
+            items = [{"product_id": product_id, "quantity": 1, "price": 1}
+                     for product_id in random.sample(product_ids, 3)]
+            start = time.perf_counter()
+            response = await client.post("/sales/", json={"payment_method": "cash", "items": items},
+                                         headers=headers)
+            sale_times.append(time.perf_counter() - start)
+            codes[response.status_code] += 1
+
+    async def read():
+        async with semaphore:
+            start = time.perf_counter()
+            await client.get("/dashboard/stats", headers=headers)
+            read_times.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    await asyncio.gather(*[sale() if i % 2 == 0 else read() for i in range(requests)])
+    elapsed = time.perf_counter() - start
+    errors = sum(count for code, count in codes.items() if code != 201)
+    return (f"{concurrency:>6} {codes[201] / elapsed:>9.0f} {percentile(sale_times, 0.5):>9.0f} "
+            f"{percentile(sale_times, 0.99):>9.0f} {percentile(read_times, 0.5):>9.0f} {errors:>8}")
+
+
+async def run_mode(concurrency_levels: list, requests: int):
+    import httpx
+    import migrate
+
+    migrate.upgrade(configure_logging=False)
+    import main
+
+    # Los errores del servidor (p. ej. "database is locked") se cuentan como respuestas 500
+    transport = httpx.ASGITransport(app=main.app, raise_app_exceptions=False)
+    async with main.app.router.lifespan_context(main.app):
+        async with httpx.AsyncClient(transport=transport, base_url="http://benchmark", timeout=120) as client:
+            user = {"email": "bench@paws.co", "username": "bench", "password": "bench",
+                    "full_name": "Benchmark", "role": "admin"}
+            await client.post("/auth/register", json=user)
+            login = await client.post("/auth/login", json={"username": "bench", "password": "bench"})
+            headers = {"Authorization": f"Bearer {login.json()['access_token']}"}
+            category = (await client.post("/categories/", json={"name": "Benchmark"}, headers=headers)).json()
+            product_ids = []
+            for i in range(20):
+                response = await client.post("/products/", headers=headers, data={
+                    "name": f"Producto {i}", "price": "1", "stock": "1000000", "category_id": str(category["id"]),
+                })
+                product_ids.append(response.json()["id"])
+            for concurrency in concurrency_levels:
+                print(await run_level(client, headers, product_ids, concurrency, requests), flush=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Ventas concurrentes en SQLite: sin y con el modo de producción")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[20, 100], help="peticiones simultáneas")
+    parser.add_argument("--requests", type=int, default=600, help="peticiones por nivel (mitad ventas)")
+    parser.add_argument("--run", choices=list(MODES), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.run:
+        asyncio.run(run_mode(args.concurrency, args.requests))
+        return
+
+    print(f"{args.requests} peticiones por nivel: mitad POST /sales/, mitad GET /dashboard/stats "
+          f"(latencias en ms)")
+    for mode, variables in MODES.items():
+        print(f"\n{mode}: " + ", ".join(f"{name}={value}" for name, value in variables.items()))
+        print(f"{'conc':>6} {'ventas/s':>9} {'venta p50':>9} {'venta p99':>9} {'lect. p50':>9} {'errores':>8}")
+        with tempfile.TemporaryDirectory() as directory:
+            env = dict(os.environ, **variables,
+                       DATABASE_URL=f"sqlite:///{os.path.join(directory, 'benchmark.db')}",
+                       IMAGE_STORAGE_DIR=os.path.join(directory, "media"), BCRYPT_ROUNDS="4", CACHE_URL="")
+            env.pop("ASYNC_DATABASE_URL", None)
+            subprocess.run(
+                [sys.executable, os.path.abspath(__file__), "--run", mode, "--requests", str(args.requests),
+                 "--concurrency", *[str(level) for level in args.concurrency]],
+                env=env, check=True, cwd=os.path.dirname(os.path.abspath(__file__)),
+            )
+
+
+if __name__ == "__main__":
+    main()
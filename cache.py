@@ -0,0 +1,173 @@
+import logging
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional
+from config import (
+    BARCODE_CACHE_SIZE, BARCODE_CACHE_TTL_SECONDS,
+    AUTH_USER_CACHE_SIZE, AUTH_USER_CACHE_TTL_SECONDS,
+    CATALOG_CACHE_SIZE, CATALOG_CACHE_TTL_SECONDS, CACHE_URL,
+)
+import metrics
+
+try:
+    import redis.asyncio as redis_asyncio
+    from redis.exceptions import RedisError
+except ImportError:  # redis es opcional: solo se necesita con CACHE_URL
+    redis_asyncio = None
+    RedisError = OSError
+
+logger = logging.getLogger(__name__)
+
+_MISSING = object()
+
+
+class LRUCache:
+    """Caché LRU en memoria, segura entre hilos, con expiración opcional por entrada"""
+
+    def __init__(self, maxsize: int = 1024, ttl: Optional[float] = None):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        with self._lock:
+            entry = self._data.get(key, _MISSING)
+            if entry is _MISSING:
+                return default
+            value, expires_at = entry
+            if expires_at is not None and expires_at < time.monotonic():
+                del self._data[key]
+                return default
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        expires_at = time.monotonic() + self.ttl if self.ttl else None
+        with self._lock:
+            self._data[key] = (value, expires_at)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def delete(self, *keys):
+        with self._lock:
+            for key in keys:
+                self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+
+class MemoryBackend:
+    """Backend por proceso (LRUCache)"""
+
+    def __init__(self, maxsize: int, ttl: float):
+        self._cache = LRUCache(maxsize, ttl=ttl)
+
+    async def get(self, key: str) -> Optional[bytes]:
+        return self._cache.get(key)
+
+    async def set(self, key: str, value: bytes):
+        self._cache.set(key, value)
+
+    async def clear(self):
+        self._cache.clear()
+
+
+class RedisBackend:
+    """
+    Backend compartido entre workers (Redis o compatible: Valkey, KeyDB...).
+    Si el servidor no responde la lectura cuenta como fallo y se consulta la BD.
+    """
+
+    def __init__(self, client, namespace: str, ttl: float):
+        self.client = client
+        self.namespace = namespace
+        self.ttl = ttl
+
+    async def get(self, key: str) -> Optional[bytes]:
+        try:
+            return await self.client.get(self.namespace + key)
+        except RedisError as exc:
+            logger.warning("Caché no disponible (%s): %s", self.namespace, exc)
+            return None
+
+    async def set(self, key: str, value: bytes):
+        try:
+            await self.client.set(self.namespace + key, value, ex=int(self.ttl))
+        except RedisError as exc:
+            logger.warning("Caché no disponible (%s): %s", self.namespace, exc)
+
+    async def clear(self):
+        try:
+            keys = [key async for key in self.client.scan_iter(match=self.namespace + "*", count=500)]
+            if keys:
+                await self.client.delete(*keys)
+        except RedisError as exc:
+            logger.warning("No se pudo invalidar la caché (%s): %s", self.namespace, exc)
+
+
+class ReadThroughCache:
+    """
+    Caché de respuestas ya serializadas (bytes), con métricas cache.<nombre>.hit/.miss.
+    La ruta consulta get(); si no hay valor lo genera desde la BD y lo guarda con set().
+    Las escrituras llaman a invalidate(). Con ttl <= 0 la caché queda desactivada.
+    """
+
+    def __init__(self, name: str, backend, ttl: float):
+        self.name = name
+        self.backend = backend
+        self.enabled = ttl > 0
+
+    async def get(self, key: str) -> Optional[bytes]:
+        if not self.enabled:
+            return None
+        value = await self.backend.get(key)
+        metrics.increment(f"cache.{self.name}.{'miss' if value is None else 'hit'}")
+        return value
+
+    async def set(self, key: str, value: bytes):
+        if self.enabled:
+            await self.backend.set(key, value)
+
+    async def invalidate(self):
+        if self.enabled:
+            await self.backend.clear()
+            metrics.increment(f"cache.{self.name}.invalidate")
+
+
+_redis_client = None
+if CACHE_URL:
+    if redis_asyncio is None:
+        raise RuntimeError("CACHE_URL requiere el paquete redis: pip install redis")
+    # La conexión se abre en la primera operación
+    _redis_client = redis_asyncio.from_url(CACHE_URL)
+
+
+def _catalog_backend(namespace: str):
+    if _redis_client is not None:
+        return RedisBackend(_redis_client, f"paws:{namespace}:", CATALOG_CACHE_TTL_SECONDS)
+    return MemoryBackend(CATALOG_CACHE_SIZE, CATALOG_CACHE_TTL_SECONDS)
+
+
+async def close():
+    if _redis_client is not None:
+        await _redis_client.aclose()
+
+
+# Productos activos por código de barras (ProductResponse ya serializable)
+barcode_cache = LRUCache(BARCODE_CACHE_SIZE, ttl=BARCODE_CACHE_TTL_SECONDS)
+
+# Columnas de usuarios autenticados por username (ver auth.get_current_user)
+user_cache = LRUCache(AUTH_USER_CACHE_SIZE, ttl=AUTH_USER_CACHE_TTL_SECONDS)
+
+# Listado de categorías y páginas de GET /products ya serializadas; las claves incluyen la
+# versión del catálogo (ver routers/categories.py y routers/products.py)
+category_cache = ReadThroughCache("categories", _catalog_backend("categories"), CATALOG_CACHE_TTL_SECONDS)
+product_list_cache = ReadThroughCache("products", _catalog_backend("products"), CATALOG_CACHE_TTL_SECONDS)
@@ -0,0 +1,36 @@
+# compression.py
+# Compresión de respuestas según lo que acepte el cliente (cabecera Accept-Encoding):
+# brotli si está instalado brotli-asgi, si no gzip; solo por encima de COMPRESSION_MIN_SIZE bytes.
+
+import re
+from starlette.datastructures import Headers
+from starlette.middleware.gzip import GZipMiddleware
+from starlette.types import ASGIApp, Receive, Scope, Send
+from config import COMPRESSION_MIN_SIZE, GZIP_LEVEL, COMPRESSION_BROTLI, BROTLI_QUALITY
+
+try:
+    from brotli_asgi import BrotliMiddleware
+except ImportError:  # brotli-asgi es opcional: sin él solo se usa gzip
+    BrotliMiddleware = None
+
+# Imágenes: ya vienen comprimidas (JPEG/PNG), comprimirlas otra vez solo gasta CPU
+_EXCLUDED_PATHS = re.compile(r"/image$")
+
+
+class CompressionMiddleware:
+    def __init__(self, app: ASGIApp):
+        self.app = app
+        self.gzip = GZipMiddleware(app, minimum_size=COMPRESSION_MIN_SIZE, compresslevel=GZIP_LEVEL)
+        # El respaldo gzip de brotli-asgi usa siempre el nivel 9: gzip se atiende aparte
+        self.brotli = BrotliMiddleware(
+            app, quality=BROTLI_QUALITY, minimum_size=COMPRESSION_MIN_SIZE, gzip_fallback=False
+        ) if COMPRESSION_BROTLI and BrotliMiddleware else None
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http" or _EXCLUDED_PATHS.search(scope["path"]):
+            await self.app(scope, receive, send)
+            return
+        if self.brotli and "br" in Headers(scope=scope).get("accept-encoding", ""):
+            await self.brotli(scope, receive, send)
+        else:
+            await self.gzip(scope, receive, send)
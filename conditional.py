@@ -0,0 +1,67 @@
+# conditional.py
+# GET condicionales: ETag a partir de los contadores de revisions.py e If-None-Match.
+#
+# El ETag se calcula antes de consultar los datos (sin generar ni hashear la respuesta):
+# si coincide con el del cliente se responde 304 sin ejecutar la ruta.
+
+from fastapi import Depends, HTTPException, Request, Response, status
+from sqlalchemy.ext.asyncio import AsyncSession
+from database import get_async_db
+from auth import get_current_user
+from models.user import User
+from utils import get_local_now
+import formats
+import metrics
+import revisions
+
+# El cliente puede guardar la respuesta pero debe revalidarla siempre
+CACHE_CONTROL = "private, no-cache"
+
+
+def etag_matches(if_none_match, etag: str) -> bool:
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    return etag in [tag.strip() for tag in if_none_match.split(",")]
+
+
+# Sufijo del ETag para cada formato compacto (ver formats.py)
+_FORMAT_SUFFIXES = {formats.COLUMNAR_JSON: "columnar", formats.MSGPACK: "msgpack"}
+
+
+def revision_etag(*names: str, daily: bool = False, negotiated: bool = False):
+    """
+    Dependencia para rutas GET: agrega ETag y Cache-Control a la respuesta, o responde
+    304 si If-None-Match coincide. daily=True para respuestas que cambian con el día
+    aunque no haya escrituras (p. ej. "ventas de hoy"); negotiated=True si la ruta
+    responde en el formato pedido con Accept (cada formato tiene su propio ETag).
+    """
+    async def check_etag(
+        request: Request,
+        response: Response,
+        db: AsyncSession = Depends(get_async_db),
+        current_user: User = Depends(get_current_user)
+    ):
+        # Los contadores se leen antes que los datos: la respuesta nunca es más vieja que su ETag
+        values = dict((await db.execute(revisions.values_statement(names))).all())
+        # La ruta las reutiliza (p. ej. como parte de la clave de caché)
+        request.state.revisions = values
+        parts = [f"{name}.{values.get(name, 0)}" for name in names]
+        if daily:
+            parts.append(get_local_now().date().isoformat())
+        headers = {"Cache-Control": CACHE_CONTROL}
+        if negotiated:
+            media_type = formats.negotiate(request.headers.get("accept"))
+            if media_type in _FORMAT_SUFFIXES:
+                parts.append(_FORMAT_SUFFIXES[media_type])
+            headers["Vary"] = "Accept"
+        etag = '"' + "-".join(parts) + '"'
+        headers["ETag"] = etag
+
+        if etag_matches(request.headers.get("if-none-match"), etag):
+            metrics.increment("etag.not_modified")
+            raise HTTPException(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+        response.headers.update(headers)
+
+    return check_etag
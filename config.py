@@ -7,7 +7,97 @@ TIMEZONE = ZoneInfo("America/Bogota")
 # Configuración de la aplicación
 SECRET_KEY = os.getenv("SECRET_KEY", "tu-clave-secreta-muy-segura-cambiala-en-produccion")
 ALGORITHM = "HS256"
-ACCESS_TOKEN_EXPIRE_MINUTES = 30
+ACCESS_TOKEN_EXPIRE_MINUTES = int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES", "30"))
+# Duración del access token por rol (ACCESS_TOKEN_EXPIRE_MINUTES_<ROL> en .env, p. ej.
+# ACCESS_TOKEN_EXPIRE_MINUTES_CASHIER=120); sin definir usa ACCESS_TOKEN_EXPIRE_MINUTES
+ACCESS_TOKEN_EXPIRE_MINUTES_BY_ROLE = {
+    role: int(os.getenv(f"ACCESS_TOKEN_EXPIRE_MINUTES_{role.upper()}", str(ACCESS_TOKEN_EXPIRE_MINUTES)))
+    for role in ("admin", "manager", "cashier")
+}
+REFRESH_TOKEN_EXPIRE_DAYS = int(os.getenv("REFRESH_TOKEN_EXPIRE_DAYS", "30"))
 
 # Configuración de base de datos
-DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./paws_pos.db")
\ No newline at end of file
+DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./paws_pos.db")
+# Aplicar las migraciones pendientes al arrancar (solo con un único proceso)
+AUTO_MIGRATE = os.getenv("AUTO_MIGRATE", "false").lower() == "true"
+# URL async (aiosqlite / asyncpg); por defecto se deriva de DATABASE_URL
+ASYNC_DATABASE_URL = os.getenv("ASYNC_DATABASE_URL")
+
+# Pool de conexiones (se aplica al engine sync y al async)
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "10"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "20"))
+DB_POOL_TIMEOUT = int(os.getenv("DB_POOL_TIMEOUT", "30"))
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))
+DB_POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "true").lower() == "true"
+# Hilos para las rutas sync (escrituras); por defecto Starlette usa 40
+THREADPOOL_WORKERS = int(os.getenv("THREADPOOL_WORKERS", "40"))
+
+# Modo producción de SQLite: WAL y PRAGMAs aplicados a cada conexión
+SQLITE_TUNING = os.getenv("SQLITE_TUNING", "true").lower() == "true"
+SQLITE_SYNCHRONOUS = os.getenv("SQLITE_SYNCHRONOUS", "NORMAL")
+SQLITE_MMAP_SIZE = int(os.getenv("SQLITE_MMAP_SIZE", str(256 * 1024 * 1024)))
+SQLITE_BUSY_TIMEOUT_MS = int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", "5000"))
+SQLITE_CACHE_SIZE_KB = int(os.getenv("SQLITE_CACHE_SIZE_KB", "20000"))
+# Un solo escritor por proceso: ventas y cambios de stock se serializan
+SQLITE_SINGLE_WRITER = os.getenv("SQLITE_SINGLE_WRITER", "true").lower() == "true"
+
+# Almacenamiento de imágenes de productos (direccionado por hash SHA-256)
+IMAGE_STORAGE_DIR = os.getenv("IMAGE_STORAGE_DIR", "./media/images")
+IMAGE_CACHE_MAX_AGE = int(os.getenv("IMAGE_CACHE_MAX_AGE", "31536000"))
+
+# Variantes redimensionadas (lado mayor en píxeles) generadas al subir la imagen
+IMAGE_VARIANTS = {
+    "thumb": int(os.getenv("IMAGE_THUMB_SIZE", "200")),
+    "detail": int(os.getenv("IMAGE_DETAIL_SIZE", "800")),
+}
+IMAGE_VARIANT_QUALITY = int(os.getenv("IMAGE_VARIANT_QUALITY", "80"))
+
+# Paginación del catálogo
+PRODUCTS_PAGE_SIZE = int(os.getenv("PRODUCTS_PAGE_SIZE", "200"))
+PRODUCTS_MAX_PAGE_SIZE = int(os.getenv("PRODUCTS_MAX_PAGE_SIZE", "1000"))
+
+# Sincronización del catálogo por delta (GET /catalog/changes)
+CATALOG_CHANGES_PAGE_SIZE = int(os.getenv("CATALOG_CHANGES_PAGE_SIZE", "500"))
+CATALOG_CHANGES_MAX_PAGE_SIZE = int(os.getenv("CATALOG_CHANGES_MAX_PAGE_SIZE", "2000"))
+
+# Compresión de respuestas (gzip; brotli si está instalado brotli-asgi)
+COMPRESSION_MIN_SIZE = int(os.getenv("COMPRESSION_MIN_SIZE", "1024"))
+GZIP_LEVEL = int(os.getenv("GZIP_LEVEL", "6"))
+COMPRESSION_BROTLI = os.getenv("COMPRESSION_BROTLI", "true").lower() == "true"
+BROTLI_QUALITY = int(os.getenv("BROTLI_QUALITY", "4"))
+
+# Eventos en tiempo real por WebSocket (/events/ws)
+EVENTS_QUEUE_SIZE = int(os.getenv("EVENTS_QUEUE_SIZE", "100"))
+EVENTS_SEND_TIMEOUT_SECONDS = float(os.getenv("EVENTS_SEND_TIMEOUT_SECONDS", "10"))
+
+# Caché en memoria para la búsqueda por código de barras (por proceso)
+BARCODE_CACHE_SIZE = int(os.getenv("BARCODE_CACHE_SIZE", "5000"))
+BARCODE_CACHE_TTL_SECONDS = int(os.getenv("BARCODE_CACHE_TTL_SECONDS", "30"))
+BARCODE_BATCH_MAX = int(os.getenv("BARCODE_BATCH_MAX", "500"))
+
+# Sincronización de ventas hechas sin conexión
+SALES_BATCH_MAX = int(os.getenv("SALES_BATCH_MAX", "500"))
+
+# Reportes de ventas
+REPORTS_MAX_HOURLY_DAYS = int(os.getenv("REPORTS_MAX_HOURLY_DAYS", "31"))
+REPORTS_CACHE_MAX_AGE = int(os.getenv("REPORTS_CACHE_MAX_AGE", "60"))
+REPORTS_CLOSED_CACHE_MAX_AGE = int(os.getenv("REPORTS_CLOSED_CACHE_MAX_AGE", "600"))
+SALES_EXPORT_CHUNK_SIZE = int(os.getenv("SALES_EXPORT_CHUNK_SIZE", "1000"))
+
+# Caché de lectura de categorías y listado de productos; 0 desactiva la caché
+CATALOG_CACHE_TTL_SECONDS = int(os.getenv("CATALOG_CACHE_TTL_SECONDS", "60"))
+CATALOG_CACHE_SIZE = int(os.getenv("CATALOG_CACHE_SIZE", "200"))
+# Backend compartido entre workers, p. ej. redis://localhost:6379/0 (requiere redis);
+# vacío = memoria de cada proceso
+CACHE_URL = os.getenv("CACHE_URL", "")
+
+# Caché de usuarios autenticados (por proceso); 0 desactiva la caché
+AUTH_USER_CACHE_TTL_SECONDS = int(os.getenv("AUTH_USER_CACHE_TTL_SECONDS", "60"))
+AUTH_USER_CACHE_SIZE = int(os.getenv("AUTH_USER_CACHE_SIZE", "1000"))
+
+# Hash de contraseñas (bcrypt): costo y ejecutor dedicado
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", "12"))
+PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", "2"))
+PASSWORD_HASH_USE_PROCESSES = os.getenv("PASSWORD_HASH_USE_PROCESSES", "false").lower() == "true"
+# Máximo de logins/registros esperando hash; por encima se responde 503
+PASSWORD_HASH_MAX_PENDING = int(os.getenv("PASSWORD_HASH_MAX_PENDING", "64"))
@@ -1,18 +1,97 @@
-from sqlalchemy import create_engine
+import asyncio
+import time
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
-from config import DATABASE_URL
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+from config import (
+    DATABASE_URL, ASYNC_DATABASE_URL, DB_POOL_SIZE, DB_MAX_OVERFLOW,
+    DB_POOL_TIMEOUT, DB_POOL_RECYCLE, DB_POOL_PRE_PING, SQLITE_TUNING, SQLITE_SYNCHRONOUS,
+    SQLITE_MMAP_SIZE, SQLITE_BUSY_TIMEOUT_MS, SQLITE_CACHE_SIZE_KB, SQLITE_SINGLE_WRITER
+)
+import metrics
 
-# Configurar engine con soporte para SQLite
-if "sqlite" in DATABASE_URL:
-    engine = create_engine(
-        DATABASE_URL, 
-        connect_args={"check_same_thread": False}
-    )
-else:
-    engine = create_engine(DATABASE_URL)
+# Driver async equivalente a cada driver sync
+_ASYNC_DRIVERS = {
+    "sqlite": "sqlite+aiosqlite",
+    "postgresql": "postgresql+asyncpg",
+    "mysql": "mysql+aiomysql",
+}
+
+
+def _async_url(url: str) -> str:
+    parsed = make_url(url)
+    driver = _ASYNC_DRIVERS.get(parsed.get_backend_name(), parsed.drivername)
+    return parsed.set(drivername=driver).render_as_string(hide_password=False)
+
+
+def _engine_options(url: str) -> dict:
+    parsed = make_url(url)
+    if parsed.get_backend_name() == "sqlite":
+        # Archivo local: las conexiones no caducan, no hace falta pre-ping ni recycle
+        options = {"connect_args": {"check_same_thread": False}}
+        # SQLite en memoria usa una sola conexión: no admite tamaño de pool
+        if parsed.database in (None, "", ":memory:"):
+            return options
+        if parsed.drivername == "sqlite+aiosqlite":
+            # aiosqlite usa NullPool por defecto: se abriría una conexión por consulta
+            options["poolclass"] = AsyncAdaptedQueuePool
+    else:
+        options = {"pool_pre_ping": DB_POOL_PRE_PING, "pool_recycle": DB_POOL_RECYCLE}
+    options.update(pool_size=DB_POOL_SIZE, max_overflow=DB_MAX_OVERFLOW, pool_timeout=DB_POOL_TIMEOUT)
+    return options
+
+
+def _set_sqlite_pragmas(dbapi_connection, connection_record):
+    # WAL: las lecturas no esperan a las escrituras; NORMAL solo sincroniza en los checkpoints
+    cursor = dbapi_connection.cursor()
+    cursor.execute("PRAGMA journal_mode=WAL")
+    cursor.execute(f"PRAGMA synchronous={SQLITE_SYNCHRONOUS}")
+    cursor.execute(f"PRAGMA busy_timeout={SQLITE_BUSY_TIMEOUT_MS}")
+    cursor.execute(f"PRAGMA mmap_size={SQLITE_MMAP_SIZE}")
+    cursor.execute(f"PRAGMA cache_size=-{SQLITE_CACHE_SIZE_KB}")
+    cursor.close()
+
+
+def _disable_pysqlite_transactions(dbapi_connection, connection_record):
+    # pysqlite solo abre la transacción antes del primer INSERT/UPDATE: con SELECT previos
+    # cada SAVEPOINT empezaría una transacción propia y RELEASE la confirmaría
+    dbapi_connection.isolation_level = None
+
+
+def _begin_sqlite_transaction(connection):
+    # La transacción la abre SQLAlchemy: así begin_nested() queda dentro de ella.
+    # IMMEDIATE toma el lock de escritura al empezar (esperando busy_timeout): una transacción
+    # que lee y después escribe no falla con "database is locked" si otro proceso escribió entre
+    # medio. Las lecturas largas (exportación) piden sqlite_deferred para no frenar las ventas.
+    mode = "DEFERRED" if connection.get_execution_options().get("sqlite_deferred") else "IMMEDIATE"
+    connection.exec_driver_sql(f"BEGIN {mode}")
+
+
+# Engine sync: registro de ventas, login, scripts y exportaciones
+engine = create_engine(DATABASE_URL, **_engine_options(DATABASE_URL))
+
+# Engine async (aiosqlite / asyncpg): rutas async de los routers
+async_database_url = ASYNC_DATABASE_URL or _async_url(DATABASE_URL)
+async_engine = create_async_engine(async_database_url, **_engine_options(async_database_url))
+
+is_sqlite = engine.dialect.name == "sqlite"
+if is_sqlite:
+    # SAVEPOINT reales para las ventas sin conexión (ventas por lote, ver routers/sales.py)
+    event.listen(engine, "connect", _disable_pysqlite_transactions)
+    event.listen(engine, "begin", _begin_sqlite_transaction)
+if is_sqlite and SQLITE_TUNING:
+    event.listen(engine, "connect", _set_sqlite_pragmas)
+    event.listen(async_engine.sync_engine, "connect", _set_sqlite_pragmas)
 
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+# Solo lectura (exportaciones): en SQLite no toma el lock de escritura
+ReadSessionLocal = sessionmaker(
+    autocommit=False, autoflush=False, bind=engine.execution_options(sqlite_deferred=True)
+)
+AsyncSessionLocal = async_sessionmaker(async_engine, class_=AsyncSession, autoflush=False, expire_on_commit=False)
 Base = declarative_base()
 
 # Dependency
@@ -21,4 +100,22 @@ def get_db():
     try:
         yield db
     finally:
-        db.close()
\ No newline at end of file
+        db.close()
+
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
+
+# SQLite admite un solo escritor: las escrituras del proceso esperan su turno aquí
+# en lugar de chocar con "database is locked" (varios workers siguen usando busy_timeout)
+_write_lock = asyncio.Lock()
+
+async def serialized_write():
+    """Dependencia para rutas que escriben (ventas, stock): una a la vez en SQLite"""
+    if not (is_sqlite and SQLITE_SINGLE_WRITER):
+        yield
+        return
+    start = time.perf_counter()
+    async with _write_lock:
+        metrics.observe("db.write_wait", time.perf_counter() - start)
+        yield
@@ -0,0 +1,88 @@
+# formats.py
+# Formatos compactos para los listados grandes (GET /products y GET /sales), a pedido con Accept:
+#   application/json                      filas como objetos (por defecto)
+#   application/vnd.paws.columnar+json    {"count": n, "columns": {"campo": [valores...]}}
+#   application/msgpack                   las mismas filas en MessagePack (si está instalado msgpack)
+
+from datetime import datetime
+from typing import Any, Optional
+from fastapi import Response
+from starlette.datastructures import MutableHeaders
+from pydantic import TypeAdapter
+
+try:
+    import msgpack
+except ImportError:  # msgpack es opcional: sin él solo se ofrecen los formatos JSON
+    msgpack = None
+
+JSON = "application/json"
+COLUMNAR_JSON = "application/vnd.paws.columnar+json"
+MSGPACK = "application/msgpack"
+
+_ALIASES = {"application/x-msgpack": MSGPACK}
+
+# Serializador JSON de pydantic-core sin esquema: no valida, solo convierte a JSON
+_json_adapter = TypeAdapter(Any)
+
+
+def available():
+    return (JSON, COLUMNAR_JSON, MSGPACK) if msgpack else (JSON, COLUMNAR_JSON)
+
+
+def negotiate(accept: Optional[str]) -> str:
+    """Formato pedido en Accept (el de mayor q entre los disponibles); JSON por defecto"""
+    best, best_q = JSON, 0.0
+    for media_range in (accept or "").split(","):
+        media_type, *params = [part.strip() for part in media_range.split(";")]
+        media_type = _ALIASES.get(media_type.lower(), media_type.lower())
+        if media_type not in available():
+            continue
+        q = 1.0
+        for param in params:
+            name, _, value = param.partition("=")
+            if name.strip() == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        if q > best_q:
+            best, best_q = media_type, q
+    return best
+
+
+def to_columns(rows: list, columns=None) -> dict:
+    if columns is None:
+        columns = list(rows[0]) if rows else []
+    return {"count": len(rows), "columns": {column: [row.get(column) for row in rows] for column in columns}}
+
+
+def _msgpack_default(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    raise TypeError(f"Cannot serialize {type(value).__name__}")
+
+
+def encode(rows: list, media_type: str, columns=None) -> bytes:
+    if media_type == MSGPACK:
+        return msgpack.packb(rows, default=_msgpack_default)
+    if media_type == COLUMNAR_JSON:
+        return _json_adapter.dump_json(to_columns(rows, columns))
+    return _json_adapter.dump_json(rows)
+
+
+def response(content: bytes, media_type: str, headers=None) -> Response:
+    """
+    Respuesta con un cuerpo ya serializado en el formato negociado. headers: cabeceras que
+    la ruta ya haya puesto (ETag, X-Next-Cursor), que FastAPI no copia al devolver un Response.
+    """
+    headers = MutableHeaders(headers=dict(headers or {}))
+    # Se suma a un Vary que ya exista (sin distinguir mayúsculas): una sola cabecera Vary
+    vary = [value.strip() for value in headers.get("vary", "").split(",") if value.strip()]
+    if "accept" not in (value.lower() for value in vary):
+        vary.append("Accept")
+    headers["Vary"] = ", ".join(vary)
+    return Response(content=content, media_type=media_type, headers=headers)
+
+
+def render(rows: list, media_type: str, columns=None, headers=None) -> Response:
+    return response(encode(rows, media_type, columns), media_type, headers)
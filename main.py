@@ -1,13 +1,30 @@
+import asyncio
+from contextlib import asynccontextmanager
+import anyio.to_thread
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from database import engine, Base
-from routers import auth, users, products, categories, sales, dashboard
+from config import THREADPOOL_WORKERS
+from database import async_engine
+from routers import auth, users, products, categories, sales, dashboard, reports, metrics, catalog, events
+from pubsub import broker
+from compression import CompressionMiddleware
+import cache
+import migrate
 
-# Crear tablas
-Base.metadata.create_all(bind=engine)
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # El esquema se crea y actualiza con python migrate.py; aquí solo se verifica la versión
+    migrate.check_schema()
+    # Hilos para las rutas que siguen siendo sync (registro de ventas)
+    anyio.to_thread.current_default_thread_limiter().total_tokens = THREADPOOL_WORKERS
+    # Las rutas sync publican eventos desde hilos: el reparto se hace en este loop
+    broker.bind(asyncio.get_running_loop())
+    yield
+    await async_engine.dispose()
+    await cache.close()
 
 # Crear aplicación FastAPI
-app = FastAPI(title="Paws POS Pro API", version="1.0.0")
+app = FastAPI(title="Paws POS Pro API", version="1.0.0", lifespan=lifespan)
 
 # Configurar CORS
 app.add_middleware(
@@ -16,7 +33,10 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "ETag"],
 )
+# gzip/brotli según Accept-Encoding (ver compression.py)
+app.add_middleware(CompressionMiddleware)
 
 # Incluir routers
 app.include_router(auth.router)
@@ -25,6 +45,10 @@ app.include_router(products.router)
 app.include_router(categories.router)
 app.include_router(sales.router)
 app.include_router(dashboard.router)
+app.include_router(reports.router)
+app.include_router(metrics.router)
+app.include_router(catalog.router)
+app.include_router(events.router)
 
 @app.get("/")
 def read_root():
@@ -0,0 +1,47 @@
+import threading
+from collections import defaultdict
+
+
+class LatencyStats:
+    """Acumula cantidad, promedio y máximo de una operación"""
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def observe(self, seconds: float):
+        self.count += 1
+        self.total += seconds
+        self.max = max(self.max, seconds)
+
+    def snapshot(self):
+        return {
+            "count": self.count,
+            "avg_ms": round(self.total / self.count * 1000, 3) if self.count else 0.0,
+            "max_ms": round(self.max * 1000, 3),
+        }
+
+
+_lock = threading.Lock()
+_latencies = defaultdict(LatencyStats)
+_counters = defaultdict(int)
+
+
+def observe(name: str, seconds: float):
+    with _lock:
+        _latencies[name].observe(seconds)
+
+
+def increment(name: str, amount: int = 1):
+    with _lock:
+        _counters[name] += amount
+
+
+def snapshot():
+    """Métricas del proceso actual"""
+    with _lock:
+        return {
+            "latency": {name: stats.snapshot() for name, stats in _latencies.items()},
+            "counters": dict(_counters),
+        }
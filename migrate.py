@@ -0,0 +1,81 @@
+# migrate.py
+# Aplica las migraciones pendientes del esquema (Alembic, ver migrations/).
+# Ejecutarlo una vez en cada despliegue, antes de arrancar los workers.
+#
+# Uso: python migrate.py            (equivale a: alembic upgrade head)
+#      python migrate.py --check    (solo indica si la base de datos está al día)
+
+import argparse
+import os
+import sys
+from alembic import command
+from alembic.config import Config
+from alembic.runtime.migration import MigrationContext
+from alembic.script import ScriptDirectory
+from config import AUTO_MIGRATE
+from database import engine
+import search
+
+_BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+def _alembic_config(configure_logging=True):
+    alembic_config = Config(os.path.join(_BASE_DIR, "alembic.ini"))
+    alembic_config.set_main_option("script_location", os.path.join(_BASE_DIR, "migrations"))
+    # Desde la aplicación no se toca la configuración de logging de uvicorn
+    alembic_config.attributes["configure_logging"] = configure_logging
+    return alembic_config
+
+
+def head_revision():
+    return ScriptDirectory.from_config(_alembic_config()).get_current_head()
+
+
+def current_revision():
+    with engine.connect() as connection:
+        return MigrationContext.configure(connection).get_current_revision()
+
+
+def upgrade(configure_logging=True):
+    command.upgrade(_alembic_config(configure_logging), "head")
+
+
+def check_schema():
+    """
+    Verificación al arrancar cada worker: solo lee alembic_version y el índice de
+    búsqueda disponible. Con AUTO_MIGRATE=true aplica las migraciones pendientes
+    (recomendado solo con un único proceso).
+    """
+    head = head_revision()
+    current = current_revision()
+    if current != head:
+        if not AUTO_MIGRATE:
+            raise RuntimeError(
+                f"La base de datos está en la versión {current or '(sin migraciones)'} y se "
+                f"esperaba {head}: ejecuta python migrate.py"
+            )
+        upgrade(configure_logging=False)
+
+    with engine.connect() as connection:
+        search.detect_backend(connection)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Aplica las migraciones del esquema")
+    parser.add_argument("--check", action="store_true", help="solo verifica la versión del esquema")
+    args = parser.parse_args()
+
+    if args.check:
+        current, head = current_revision(), head_revision()
+        if current != head:
+            print(f"❌ Base de datos en {current or '(sin migraciones)'}, se esperaba {head}")
+            sys.exit(1)
+        print(f"✅ Base de datos al día ({head})")
+        return
+
+    upgrade()
+    print(f"✅ Migraciones aplicadas ({head_revision()})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+# migrate_images.py
+# Mueve las imágenes guardadas en products.image_base64 al almacén de imágenes
+# (ver storage.py), genera sus variantes redimensionadas y deja en la tabla solo el hash.
+#
+# Requiere el esquema al día (python migrate.py).
+#
+# Uso: python migrate_images.py [--batch-size 100]
+
+import argparse
+import base64
+import binascii
+from database import SessionLocal
+from migrate import check_schema
+from models.product import Product
+import storage
+import revisions
+
+
+def migrate(batch_size=100):
+    migrated = 0
+    failed = 0
+    last_id = 0
+    db = SessionLocal()
+    try:
+        while True:
+            rows = db.query(Product.id, Product.image_base64).filter(
+                Product.id > last_id,
+                Product.image_base64.isnot(None),
+                Product.image_hash.is_(None)
+            ).order_by(Product.id).limit(batch_size).all()
+            if not rows:
+                break
+
+            # Las filas migradas cambian su image_url: las terminales las reciben por /catalog/changes
+            revision = revisions.bump(db)
+            for product_id, image_base64 in rows:
+                last_id = product_id
+                try:
+                    data = base64.b64decode(image_base64, validate=True)
+                except (binascii.Error, ValueError):
+                    print(f"❌ Producto {product_id}: imagen base64 inválida, se conserva")
+                    failed += 1
+                    continue
+
+                values = {Product.image_base64: None, Product.revision: revision}
+                if data:
+                    image_hash = storage.save_image(data)
+                    storage.generate_variants(image_hash)
+                    values[Product.image_hash] = image_hash
+                db.query(Product).filter(Product.id == product_id).update(
+                    values, synchronize_session=False
+                )
+                migrated += 1
+
+            db.commit()
+            print(f"   ... {migrated} imágenes migradas")
+    finally:
+        db.close()
+
+    return migrated, failed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Migra imágenes base64 al almacén de imágenes")
+    parser.add_argument("--batch-size", type=int, default=100)
+    args = parser.parse_args()
+
+    # El esquema (image_hash, contadores de versión) lo crean las migraciones de Alembic
+    try:
+        check_schema()
+    except RuntimeError as exc:
+        raise SystemExit(f"❌ {exc}")
+    migrated, failed = migrate(args.batch_size)
+    print(f"✅ Migración completada: {migrated} imágenes migradas, {failed} con errores")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,39 @@
+from logging.config import fileConfig
+from alembic import context
+from database import engine, Base
+import models  # noqa: F401  (registra todas las tablas en Base.metadata)
+
+config = context.config
+if config.config_file_name is not None and config.attributes.get("configure_logging", True):
+    fileConfig(config.config_file_name)
+
+target_metadata = Base.metadata
+
+
+def include_object(object, name, type_, reflected, compare_to):
+    # Tablas e índices de búsqueda que crea search.py (no están en los modelos)
+    if type_ == "table" and name.startswith("products_fts"):
+        return False
+    if type_ == "index" and name == "ix_products_search_trgm":
+        return False
+    return True
+
+
+def run_migrations_online():
+    # Mismo engine de la aplicación (incluye los PRAGMA de SQLite)
+    with engine.connect() as connection:
+        context.configure(
+            connection=connection,
+            target_metadata=target_metadata,
+            include_object=include_object,
+            # SQLite no soporta ALTER completo: se recrean las tablas por lotes
+            render_as_batch=connection.dialect.name == "sqlite",
+        )
+        with context.begin_transaction():
+            context.run_migrations()
+
+
+if context.is_offline_mode():
+    # Las migraciones revisan el esquema existente antes de cambiarlo: necesitan conexión
+    raise SystemExit("El modo --sql no está soportado: ejecuta las migraciones contra la base de datos")
+run_migrations_online()
@@ -0,0 +1,99 @@
+"""Esquema inicial (el que creaba Base.metadata.create_all)
+
+Las bases de datos creadas antes de usar Alembic ya tienen estas tablas:
+solo se crean las que falten.
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-17
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0001"
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    existing = set(sa.inspect(op.get_bind()).get_table_names())
+
+    if "users" not in existing:
+        op.create_table(
+            "users",
+            sa.Column("id", sa.Integer(), primary_key=True),
+            sa.Column("email", sa.String(), nullable=False),
+            sa.Column("username", sa.String(), nullable=False),
+            sa.Column("hashed_password", sa.String(), nullable=False),
+            sa.Column("full_name", sa.String(), nullable=False),
+            sa.Column("role", sa.String()),
+            sa.Column("is_active", sa.Boolean()),
+            sa.Column("created_at", sa.DateTime()),
+        )
+        op.create_index("ix_users_id", "users", ["id"])
+        op.create_index("ix_users_email", "users", ["email"], unique=True)
+        op.create_index("ix_users_username", "users", ["username"], unique=True)
+
+    if "categories" not in existing:
+        op.create_table(
+            "categories",
+            sa.Column("id", sa.Integer(), primary_key=True),
+            sa.Column("name", sa.String(), nullable=False),
+            sa.Column("description", sa.String()),
+        )
+        op.create_index("ix_categories_id", "categories", ["id"])
+        op.create_index("ix_categories_name", "categories", ["name"], unique=True)
+
+    if "products" not in existing:
+        op.create_table(
+            "products",
+            sa.Column("id", sa.Integer(), primary_key=True),
+            sa.Column("name", sa.String(), nullable=False),
+            sa.Column("description", sa.String()),
+            sa.Column("price", sa.Float(), nullable=False),
+            sa.Column("cost", sa.Float()),
+            sa.Column("stock", sa.Integer()),
+            sa.Column("barcode", sa.String(), unique=True),
+            sa.Column("category_id", sa.Integer(), sa.ForeignKey("categories.id")),
+            sa.Column("image_base64", sa.Text()),
+            sa.Column("unidad_medida", sa.Text()),
+            sa.Column("is_active", sa.Boolean()),
+            sa.Column("created_at", sa.DateTime()),
+        )
+        op.create_index("ix_products_id", "products", ["id"])
+        op.create_index("ix_products_name", "products", ["name"])
+
+    if "sales" not in existing:
+        op.create_table(
+            "sales",
+            sa.Column("id", sa.Integer(), primary_key=True),
+            sa.Column("user_id", sa.Integer(), sa.ForeignKey("users.id")),
+            sa.Column("total", sa.Float(), nullable=False),
+            sa.Column("subtotal", sa.Float(), nullable=False),
+            sa.Column("tax", sa.Float()),
+            sa.Column("discount", sa.Float()),
+            sa.Column("payment_method", sa.String(), nullable=False),
+            sa.Column("customer_name", sa.String()),
+            sa.Column("customer_email", sa.String()),
+            sa.Column("notes", sa.String()),
+            sa.Column("created_at", sa.DateTime()),
+        )
+        op.create_index("ix_sales_id", "sales", ["id"])
+
+    if "sale_items" not in existing:
+        op.create_table(
+            "sale_items",
+            sa.Column("id", sa.Integer(), primary_key=True),
+            sa.Column("sale_id", sa.Integer(), sa.ForeignKey("sales.id")),
+            sa.Column("product_id", sa.Integer(), sa.ForeignKey("products.id")),
+            sa.Column("quantity", sa.Integer(), nullable=False),
+            sa.Column("price", sa.Float(), nullable=False),
+            sa.Column("subtotal", sa.Float(), nullable=False),
+        )
+        op.create_index("ix_sale_items_id", "sale_items", ["id"])
+
+
+def downgrade():
+    for table in ("sale_items", "sales", "products", "categories", "users"):
+        op.drop_table(table)
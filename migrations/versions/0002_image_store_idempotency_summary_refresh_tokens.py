@@ -0,0 +1,97 @@
+"""Columnas y tablas agregadas después del esquema inicial
+
+- products.image_hash (almacén de imágenes, ver migrate_images.py)
+- sales.client_sale_id (ventas idempotentes)
+- daily_sales_summary (resumen del dashboard), se llena con el histórico
+- refresh_tokens
+
+Solo se crea lo que falte: las bases creadas con create_all ya lo tienen.
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-17
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0002"
+down_revision = "0001"
+branch_labels = None
+depends_on = None
+
+
+def _columns(inspector, table):
+    return {column["name"] for column in inspector.get_columns(table)}
+
+
+def _fill_sales_summary(summary):
+    """Llena el resumen con el histórico de ventas (misma consulta que sales_summary.rebuild)"""
+    # Tabla fija de esta versión: la migración no depende de los modelos actuales
+    sales = sa.table(
+        "sales",
+        sa.column("id", sa.Integer),
+        sa.column("user_id", sa.Integer),
+        sa.column("total", sa.Float),
+        sa.column("payment_method", sa.String),
+        sa.column("created_at", sa.DateTime),
+    )
+    sales_date = sa.func.date(sales.c.created_at)
+    user_id = sa.func.coalesce(sales.c.user_id, 0)
+    rows = sa.select(
+        sales_date,
+        user_id,
+        sales.c.payment_method,
+        sa.func.count(sales.c.id),
+        sa.func.coalesce(sa.func.sum(sales.c.total), 0.0),
+    ).group_by(sales_date, user_id, sales.c.payment_method)
+    op.execute(summary.insert().from_select(
+        ["sales_date", "user_id", "payment_method", "sales_count", "revenue"], rows
+    ))
+
+
+def upgrade():
+    inspector = sa.inspect(op.get_bind())
+    existing = set(inspector.get_table_names())
+
+    if "image_hash" not in _columns(inspector, "products"):
+        op.add_column("products", sa.Column("image_hash", sa.String(64), nullable=True))
+
+    if "client_sale_id" not in _columns(inspector, "sales"):
+        op.add_column("sales", sa.Column("client_sale_id", sa.String(64), nullable=True))
+        op.create_index("ix_sales_client_sale_id", "sales", ["client_sale_id"], unique=True)
+
+    if "daily_sales_summary" not in existing:
+        summary = op.create_table(
+            "daily_sales_summary",
+            sa.Column("sales_date", sa.Date(), primary_key=True),
+            sa.Column("user_id", sa.Integer(), primary_key=True),
+            sa.Column("payment_method", sa.String(), primary_key=True),
+            sa.Column("sales_count", sa.Integer(), nullable=False),
+            sa.Column("revenue", sa.Float(), nullable=False),
+        )
+        _fill_sales_summary(summary)
+
+    if "refresh_tokens" not in existing:
+        op.create_table(
+            "refresh_tokens",
+            sa.Column("id", sa.Integer(), primary_key=True),
+            sa.Column("user_id", sa.Integer(), sa.ForeignKey("users.id"), nullable=False),
+            sa.Column("token_hash", sa.String(64), nullable=False),
+            sa.Column("expires_at", sa.DateTime(), nullable=False),
+            sa.Column("revoked_at", sa.DateTime(), nullable=True),
+            sa.Column("replaced_by_id", sa.Integer(), nullable=True),
+            sa.Column("created_at", sa.DateTime()),
+        )
+        op.create_index("ix_refresh_tokens_id", "refresh_tokens", ["id"])
+        op.create_index("ix_refresh_tokens_user_id", "refresh_tokens", ["user_id"])
+        op.create_index("ix_refresh_tokens_token_hash", "refresh_tokens", ["token_hash"], unique=True)
+
+
+def downgrade():
+    op.drop_table("refresh_tokens")
+    op.drop_table("daily_sales_summary")
+    with op.batch_alter_table("sales") as batch:
+        batch.drop_index("ix_sales_client_sale_id")
+        batch.drop_column("client_sale_id")
+    with op.batch_alter_table("products") as batch:
+        batch.drop_column("image_hash")
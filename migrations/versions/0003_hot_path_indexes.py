@@ -0,0 +1,41 @@
+"""Índices para las consultas del dashboard, listados de ventas y catálogo
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-17
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0003"
+down_revision = "0002"
+branch_labels = None
+depends_on = None
+
+# (nombre, tabla, columnas)
+INDEXES = [
+    ("ix_sales_user_id", "sales", ["user_id"]),
+    ("ix_sales_created_at_desc", "sales", [sa.text("created_at DESC")]),
+    ("ix_sale_items_sale_id", "sale_items", ["sale_id"]),
+    ("ix_sale_items_product_id", "sale_items", ["product_id"]),
+    ("ix_products_category_id", "products", ["category_id"]),
+    ("ix_products_active_category_name", "products", ["is_active", "category_id", "name"]),
+    ("ix_products_active_stock", "products", ["is_active", "stock"]),
+]
+
+
+def _existing_indexes(table):
+    return {index["name"] for index in sa.inspect(op.get_bind()).get_indexes(table)}
+
+
+def upgrade():
+    # Las bases creadas con create_all después de este cambio ya los tienen
+    for name, table, columns in INDEXES:
+        if name not in _existing_indexes(table):
+            op.create_index(name, table, columns)
+
+
+def downgrade():
+    for name, table, _ in reversed(INDEXES):
+        if name in _existing_indexes(table):
+            op.drop_index(name, table_name=table)
@@ -0,0 +1,23 @@
+"""Índice de búsqueda de productos (FTS5 en SQLite, pg_trgm en PostgreSQL)
+
+Antes se creaba al arrancar la aplicación (search.setup_search).
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-17
+"""
+from alembic import op
+import search
+
+revision = "0004"
+down_revision = "0003"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    search.create_search_index(op.get_bind())
+
+
+def downgrade():
+    search.drop_search_index(op.get_bind())
@@ -0,0 +1,44 @@
+"""Versión de catálogo en productos y categorías (sincronización por delta)
+
+Las filas existentes quedan en la versión 1 y el contador "catalog" empieza en 1,
+así una terminal que pide since=0 recibe todo el catálogo.
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-17
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0005"
+down_revision = "0004"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        "revision_counters",
+        sa.Column("name", sa.String(32), primary_key=True),
+        sa.Column("value", sa.Integer(), nullable=False),
+    )
+    op.bulk_insert(
+        sa.table("revision_counters", sa.column("name", sa.String), sa.column("value", sa.Integer)),
+        [{"name": "catalog", "value": 1}],
+    )
+
+    for table in ("products", "categories"):
+        with op.batch_alter_table(table) as batch:
+            batch.add_column(sa.Column("revision", sa.Integer(), nullable=False, server_default="1"))
+            batch.add_column(sa.Column("updated_at", sa.DateTime(), nullable=True))
+            batch.create_index(f"ix_{table}_revision", ["revision"])
+    op.execute("UPDATE products SET updated_at = created_at")
+
+
+def downgrade():
+    for table in ("categories", "products"):
+        with op.batch_alter_table(table) as batch:
+            batch.drop_index(f"ix_{table}_revision")
+            batch.drop_column("updated_at")
+            batch.drop_column("revision")
+    op.drop_table("revision_counters")
@@ -0,0 +1,23 @@
+"""Contador de versión de ventas (ETag de /dashboard/stats)
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-17
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0006"
+down_revision = "0005"
+branch_labels = None
+depends_on = None
+
+_counters = sa.table("revision_counters", sa.column("name", sa.String), sa.column("value", sa.Integer))
+
+
+def upgrade():
+    op.bulk_insert(_counters, [{"name": "sales", "value": 1}])
+
+
+def downgrade():
+    op.execute(_counters.delete().where(_counters.c.name == "sales"))
@@ -2,5 +2,8 @@ from .user import User
 from .category import Category
 from .product import Product
 from .sale import Sale, SaleItem
+from .daily_sales_summary import DailySalesSummary
+from .refresh_token import RefreshToken
+from .revision import RevisionCounter
 
-__all__ = ["User", "Category", "Product", "Sale", "SaleItem"]
\ No newline at end of file
+__all__ = ["User", "Category", "Product", "Sale", "SaleItem", "DailySalesSummary", "RefreshToken", "RevisionCounter"]
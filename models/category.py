@@ -1,6 +1,7 @@
-from sqlalchemy import Column, Integer, String
+from sqlalchemy import Column, Integer, String, DateTime
 from sqlalchemy.orm import relationship
 from database import Base
+from utils import get_local_now
 
 class Category(Base):
     __tablename__ = "categories"
@@ -8,5 +9,7 @@ class Category(Base):
     id = Column(Integer, primary_key=True, index=True)
     name = Column(String, unique=True, index=True, nullable=False)
     description = Column(String)
+    revision = Column(Integer, nullable=False, default=0, index=True)
+    updated_at = Column(DateTime, default=get_local_now, onupdate=get_local_now)
     
     products = relationship("Product", back_populates="category")
\ No newline at end of file
@@ -0,0 +1,12 @@
+from sqlalchemy import Column, Integer, String, Float, Date
+from database import Base
+
+# Resumen de ventas por día, cajero y método de pago (ver sales_summary.py)
+class DailySalesSummary(Base):
+    __tablename__ = "daily_sales_summary"
+    
+    sales_date = Column(Date, primary_key=True)
+    user_id = Column(Integer, primary_key=True)
+    payment_method = Column(String, primary_key=True)
+    sales_count = Column(Integer, nullable=False, default=0)
+    revenue = Column(Float, nullable=False, default=0.0)
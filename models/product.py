@@ -1,7 +1,8 @@
-from sqlalchemy import Column, Integer, String, Float, Boolean, DateTime, ForeignKey,Text
-from sqlalchemy.orm import relationship
+from sqlalchemy import Column, Integer, String, Float, Boolean, DateTime, ForeignKey, Index, Text
+from sqlalchemy.orm import relationship, deferred
 from database import Base
 from utils import get_local_now
+import storage
 
 class Product(Base):
     __tablename__ = "products"
@@ -13,9 +14,25 @@ class Product(Base):
     cost = Column(Float, default=0.0)
     stock = Column(Integer, default=0)
     barcode = Column(String, unique=True)
-    category_id = Column(Integer, ForeignKey("categories.id"))
-    image_base64 = Column(Text, nullable=True)
+    category_id = Column(Integer, ForeignKey("categories.id"), index=True)
+    # Legado: las imágenes nuevas van al almacén (storage.py); ver migrate_images.py
+    image_base64 = deferred(Column(Text, nullable=True))
+    image_hash = Column(String(64), nullable=True)
     unidad_medida = Column(Text, nullable=True)
     is_active = Column(Boolean, default=True)
     created_at = Column(DateTime, default=get_local_now)
-    category = relationship("Category", back_populates="products")
\ No newline at end of file
+    # Versión del catálogo en que cambió por última vez (ver revisions.py y /catalog/changes)
+    revision = Column(Integer, nullable=False, default=0, index=True)
+    updated_at = Column(DateTime, default=get_local_now, onupdate=get_local_now)
+    category = relationship("Category", back_populates="products")
+
+    __table_args__ = (
+        # Catálogo activo filtrado por categoría y ordenado por nombre
+        Index("ix_products_active_category_name", "is_active", "category_id", "name"),
+        # Conteo de productos activos y con stock bajo del dashboard (índice cubriente)
+        Index("ix_products_active_stock", "is_active", "stock"),
+    )
+
+    @property
+    def image_url(self):
+        return storage.image_url(self.id, self.image_hash)
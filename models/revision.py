@@ -0,0 +1,9 @@
+from sqlalchemy import Column, Integer, String
+from database import Base
+
+# Contadores de versión por flujo de cambios (ver revisions.py); "catalog" cubre productos y categorías
+class RevisionCounter(Base):
+    __tablename__ = "revision_counters"
+    
+    name = Column(String(32), primary_key=True)
+    value = Column(Integer, nullable=False, default=0)
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Float, DateTime, ForeignKey
+from sqlalchemy import Column, Integer, String, Float, DateTime, ForeignKey, Index
 from sqlalchemy.orm import relationship
 from database import Base
 from utils import get_local_now
@@ -7,7 +7,7 @@ class Sale(Base):
     __tablename__ = "sales"
     
     id = Column(Integer, primary_key=True, index=True)
-    user_id = Column(Integer, ForeignKey("users.id"))
+    user_id = Column(Integer, ForeignKey("users.id"), index=True)
     total = Column(Float, nullable=False)
     subtotal = Column(Float, nullable=False)
     tax = Column(Float, default=0.0)
@@ -16,17 +16,22 @@ class Sale(Base):
     customer_name = Column(String)
     customer_email = Column(String)
     notes = Column(String)
+    # Identificador generado por la terminal (Idempotency-Key) para reintentos seguros
+    client_sale_id = Column(String(64), unique=True, index=True, nullable=True)
     created_at = Column(DateTime, default=get_local_now)
     
     items = relationship("SaleItem", back_populates="sale")
     user = relationship("User")
 
+    # Listados y reportes: rangos de fecha, lo más reciente primero
+    __table_args__ = (Index("ix_sales_created_at_desc", created_at.desc()),)
+
 class SaleItem(Base):
     __tablename__ = "sale_items"
     
     id = Column(Integer, primary_key=True, index=True)
-    sale_id = Column(Integer, ForeignKey("sales.id"))
-    product_id = Column(Integer, ForeignKey("products.id"))
+    sale_id = Column(Integer, ForeignKey("sales.id"), index=True)
+    product_id = Column(Integer, ForeignKey("products.id"), index=True)
     quantity = Column(Integer, nullable=False)
     price = Column(Float, nullable=False)
     subtotal = Column(Float, nullable=False)
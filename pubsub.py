@@ -0,0 +1,78 @@
+import asyncio
+import json
+import threading
+from datetime import datetime
+from typing import Optional
+from config import EVENTS_QUEUE_SIZE
+import metrics
+
+# Marca que se encola cuando un cliente no alcanza a leer: el socket se cierra
+LAGGING = None
+
+
+def _json_default(value):
+    return value.isoformat() if isinstance(value, datetime) else str(value)
+
+
+class Broker:
+    """
+    Pub/sub en memoria del proceso: cada suscriptor tiene una cola acotada.
+    publish() se puede llamar desde el event loop o desde los hilos de las rutas sync;
+    el reparto siempre ocurre en el loop. Si la cola de un cliente se llena se descartan
+    sus eventos pendientes y se le avisa con LAGGING (debe resincronizar el catálogo).
+    """
+
+    def __init__(self, queue_size: int = 100):
+        self.queue_size = queue_size
+        self._subscribers = set()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._lock = threading.Lock()
+
+    def bind(self, loop: asyncio.AbstractEventLoop):
+        self._loop = loop
+
+    def subscribe(self) -> asyncio.Queue:
+        queue = asyncio.Queue(maxsize=self.queue_size)
+        with self._lock:
+            self._subscribers.add(queue)
+        return queue
+
+    def unsubscribe(self, queue: asyncio.Queue):
+        with self._lock:
+            self._subscribers.discard(queue)
+
+    def publish(self, event_type: str, **data):
+        loop = self._loop
+        if loop is None or loop.is_closed() or not self._subscribers:
+            return
+        # Se serializa una sola vez para todos los clientes
+        payload = json.dumps({"type": event_type, **data}, separators=(",", ":"), default=_json_default)
+        try:
+            in_loop = asyncio.get_running_loop() is loop
+        except RuntimeError:
+            in_loop = False
+        if in_loop:
+            self._dispatch(payload)
+        else:
+            loop.call_soon_threadsafe(self._dispatch, payload)
+
+    def _dispatch(self, payload: str):
+        with self._lock:
+            subscribers = list(self._subscribers)
+        for queue in subscribers:
+            try:
+                queue.put_nowait(payload)
+            except asyncio.QueueFull:
+                self.unsubscribe(queue)
+                while not queue.empty():
+                    queue.get_nowait()
+                queue.put_nowait(LAGGING)
+                metrics.increment("events.lagging_clients")
+        metrics.increment("events.published")
+
+    def __len__(self):
+        return len(self._subscribers)
+
+
+# Eventos de ventas y stock para las terminales y el dashboard (ver routers/events.py)
+broker = Broker(EVENTS_QUEUE_SIZE)
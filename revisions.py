@@ -0,0 +1,42 @@
+# revisions.py
+# Contadores de versión (tabla revision_counters) para sincronizar cambios por delta.
+#
+# Cada escritura del catálogo incrementa el contador "catalog" en su misma transacción y
+# marca las filas que cambió con el nuevo valor. El UPDATE bloquea la fila del contador
+# hasta el commit, así las versiones se confirman en orden y un cliente que ya leyó la
+# versión N nunca se salta una fila con versión <= N que se confirme después.
+#
+# Contadores: "catalog" (productos, categorías y stock) y "sales" (ventas y resumen diario).
+# También sirven para los ETag de los GET (ver conditional.py).
+
+from sqlalchemy import select, update
+from sqlalchemy.orm import Session
+from models.revision import RevisionCounter
+
+CATALOG = "catalog"
+SALES = "sales"
+
+
+def bump(db: Session, name: str = CATALOG) -> int:
+    """Incrementa el contador y devuelve la nueva versión (sin hacer commit)"""
+    result = db.execute(
+        update(RevisionCounter)
+        .where(RevisionCounter.name == name)
+        .values(value=RevisionCounter.value + 1)
+        .execution_options(synchronize_session=False)
+    )
+    if result.rowcount == 0:
+        db.add(RevisionCounter(name=name, value=1))
+        db.flush()
+        return 1
+    return db.execute(select(RevisionCounter.value).where(RevisionCounter.name == name)).scalar_one()
+
+
+def current_statement(name: str = CATALOG):
+    """SELECT de la versión actual (sirve para Session y AsyncSession)"""
+    return select(RevisionCounter.value).where(RevisionCounter.name == name)
+
+
+def values_statement(names):
+    """SELECT (nombre, versión) de varios contadores en una sola consulta"""
+    return select(RevisionCounter.name, RevisionCounter.value).where(RevisionCounter.name.in_(list(names)))
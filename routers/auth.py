@@ -1,23 +1,40 @@
 from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import update
 from sqlalchemy.orm import Session
 from database import get_db
-from auth import verify_password, create_access_token, get_password_hash
+from auth import verify_password_async, get_password_hash_async, issue_tokens, hash_refresh_token, revoke_refresh_tokens
 from models.user import User
-from schemas.user import UserCreate, UserResponse, UserLogin, Token
+from models.refresh_token import RefreshToken
+from schemas.user import UserCreate, UserResponse, UserLogin, Token, RefreshTokenRequest
+from utils import get_local_now
 
 router = APIRouter(prefix="/auth", tags=["authentication"])
 
+# Las rutas son async para que bcrypt corra en su propio ejecutor (ver auth.py);
+# el acceso a la BD, que es bloqueante, se hace en el threadpool.
+
+def _find_user(db: Session, username: str, email: str = None):
+    query = db.query(User)
+    if email is not None:
+        return query.filter((User.email == email) | (User.username == username)).first()
+    return query.filter(User.username == username).first()
+
+def _save(db: Session, instance):
+    db.add(instance)
+    db.commit()
+    db.refresh(instance)
+    return instance
+
 @router.post("/register", response_model=UserResponse, status_code=status.HTTP_201_CREATED)
-def register(user: UserCreate, db: Session = Depends(get_db)):
+async def register(user: UserCreate, db: Session = Depends(get_db)):
     # Verificar si el usuario ya existe
-    db_user = db.query(User).filter(
-        (User.email == user.email) | (User.username == user.username)
-    ).first()
+    db_user = await run_in_threadpool(_find_user, db, user.username, user.email)
     if db_user:
         raise HTTPException(status_code=400, detail="Email or username already registered")
     
     # Crear nuevo usuario
-    hashed_password = get_password_hash(user.password)
+    hashed_password = await get_password_hash_async(user.password)
     new_user = User(
         email=user.email,
         username=user.username,
@@ -26,19 +43,78 @@ def register(user: UserCreate, db: Session = Depends(get_db)):
         role=user.role
     )
     
-    db.add(new_user)
-    db.commit()
-    db.refresh(new_user)
-    return new_user
+    return await run_in_threadpool(_save, db, new_user)
 
 @router.post("/login", response_model=Token)
-def login(user_credentials: UserLogin, db: Session = Depends(get_db)):
-    user = db.query(User).filter(User.username == user_credentials.username).first()
-    if not user or not verify_password(user_credentials.password, user.hashed_password):
+async def login(user_credentials: UserLogin, db: Session = Depends(get_db)):
+    user = await run_in_threadpool(_find_user, db, user_credentials.username)
+    if not user:
+        raise HTTPException(status_code=401, detail="Incorrect username or password")
+    valid, new_hash = await verify_password_async(user_credentials.password, user.hashed_password)
+    if not valid:
         raise HTTPException(status_code=401, detail="Incorrect username or password")
     
     if not user.is_active:
         raise HTTPException(status_code=400, detail="Inactive user")
-    
-    access_token = create_access_token(data={"sub": user.username})
-    return {"access_token": access_token, "token_type": "bearer"}
\ No newline at end of file
+
+    return await run_in_threadpool(_start_session, db, user, new_hash)
+
+def _start_session(db: Session, user: User, new_hash: str = None):
+    # Re-hash transparente si cambió BCRYPT_ROUNDS
+    if new_hash:
+        user.hashed_password = new_hash
+    tokens = issue_tokens(db, user)
+    db.commit()
+    return tokens
+
+# ✅ RENOVAR ACCESS TOKEN SIN CONTRASEÑA (rota el refresh token)
+@router.post("/refresh", response_model=Token)
+def refresh(body: RefreshTokenRequest, db: Session = Depends(get_db)):
+    stored = db.query(RefreshToken).filter(
+        RefreshToken.token_hash == hash_refresh_token(body.refresh_token)
+    ).first()
+    if not stored:
+        raise HTTPException(status_code=401, detail="Invalid refresh token")
+
+    # Solo una petición puede consumir el token, aunque lleguen dos a la vez
+    consumed = db.execute(
+        update(RefreshToken)
+        .where(RefreshToken.id == stored.id, RefreshToken.revoked_at.is_(None))
+        .values(revoked_at=get_local_now())
+    ).rowcount
+    if not consumed:
+        # Token ya usado: posible robo, se cierran todas las sesiones del usuario
+        revoke_refresh_tokens(db, stored.user_id)
+        db.commit()
+        raise HTTPException(status_code=401, detail="Refresh token already used")
+
+    still_valid = db.query(RefreshToken.id).filter(
+        RefreshToken.id == stored.id, RefreshToken.expires_at > get_local_now()
+    ).first()
+    if not still_valid:
+        db.commit()
+        raise HTTPException(status_code=401, detail="Refresh token expired")
+
+    user = db.query(User).filter(User.id == stored.user_id).first()
+    if not user or not user.is_active:
+        db.commit()
+        raise HTTPException(status_code=401, detail="Inactive user")
+
+    tokens = issue_tokens(db, user)
+    stored.replaced_by_id = tokens["refresh_token_id"]
+    db.commit()
+    return tokens
+
+# ✅ CERRAR SESIÓN (revoca el refresh token)
+@router.post("/logout", status_code=status.HTTP_204_NO_CONTENT)
+def logout(body: RefreshTokenRequest, db: Session = Depends(get_db)):
+    db.execute(
+        update(RefreshToken)
+        .where(
+            RefreshToken.token_hash == hash_refresh_token(body.refresh_token),
+            RefreshToken.revoked_at.is_(None)
+        )
+        .values(revoked_at=get_local_now())
+    )
+    db.commit()
+    return None
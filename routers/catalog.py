@@ -0,0 +1,74 @@
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Optional
+from config import CATALOG_CHANGES_PAGE_SIZE, CATALOG_CHANGES_MAX_PAGE_SIZE
+from database import get_async_db
+from auth import get_current_user
+from models.user import User
+from models.product import Product
+from models.category import Category
+from schemas.catalog import CatalogChangesResponse
+from conditional import revision_etag
+import revisions
+
+router = APIRouter(prefix="/catalog", tags=["catalog"])
+
+# ✅ CAMBIOS DEL CATÁLOGO DESDE LA VERSIÓN since
+# La terminal guarda el catálogo completo una vez (since=0) y luego solo pide el delta.
+# Si has_more es True debe volver a llamar con since=revision hasta recibir has_more=False.
+@router.get(
+    "/changes", response_model=CatalogChangesResponse,
+    dependencies=[Depends(revision_etag(revisions.CATALOG))]
+)
+async def get_catalog_changes(
+    since: int = Query(0, ge=0),
+    limit: Optional[int] = Query(None, ge=1, le=CATALOG_CHANGES_MAX_PAGE_SIZE),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(get_current_user)
+):
+    limit = limit or CATALOG_CHANGES_PAGE_SIZE
+
+    # El contador se lee antes que las filas: nada confirmado después puede quedar por debajo
+    current = (await db.execute(revisions.current_statement())).scalar_one_or_none() or 0
+    reset = since > current
+    if reset:
+        since = 0
+
+    rows = (await db.execute(
+        select(Product)
+        .where(Product.revision > since)
+        .order_by(Product.revision, Product.id)
+        .limit(limit + 1)
+    )).scalars().all()
+
+    has_more = len(rows) > limit
+    if has_more:
+        # Una versión (p. ej. una venta o un lote de migrate_images) no se parte entre páginas
+        last_revision = rows[limit].revision
+        rows = [row for row in rows[:limit] if row.revision < last_revision]
+        if not rows:
+            rows = (await db.execute(
+                select(Product)
+                .where(Product.revision > since, Product.revision <= last_revision)
+                .order_by(Product.revision, Product.id)
+            )).scalars().all()
+        revision = rows[-1].revision
+    else:
+        revision = max([current] + [row.revision for row in rows])
+
+    categories = (await db.execute(
+        select(Category)
+        .where(Category.revision > since, Category.revision <= revision)
+        .order_by(Category.revision, Category.id)
+    )).scalars().all()
+
+    return {
+        "revision": revision,
+        "has_more": has_more,
+        "reset": reset,
+        "products": [row for row in rows if row.is_active],
+        # En una carga completa (since=0) los inactivos simplemente no se envían
+        "deactivated_product_ids": [row.id for row in rows if not row.is_active] if since else [],
+        "categories": categories,
+    }
@@ -1,33 +1,61 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List
-from database import get_db
+from database import get_async_db, serialized_write
 from auth import get_current_user
 from models.user import User
 from models.category import Category
 from schemas.category import CategoryCreate, CategoryResponse
+import revisions
+from pubsub import broker
+from cache import category_cache
+import formats
+from conditional import revision_etag
 
 router = APIRouter(prefix="/categories", tags=["categories"])
 
-@router.post("/", response_model=CategoryResponse, status_code=status.HTTP_201_CREATED)
-def create_category(
-    category: CategoryCreate, 
-    db: Session = Depends(get_db), 
+@router.post(
+    "/", response_model=CategoryResponse, status_code=status.HTTP_201_CREATED,
+    dependencies=[Depends(serialized_write)]
+)
+async def create_category(
+    category: CategoryCreate,
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user)
 ):
-    db_category = db.query(Category).filter(Category.name == category.name).first()
+    db_category = (await db.execute(select(Category).where(Category.name == category.name))).scalars().first()
     if db_category:
         raise HTTPException(status_code=400, detail="Category already exists")
-    
+
     new_category = Category(**category.dict())
+    new_category.revision = await db.run_sync(revisions.bump)
     db.add(new_category)
-    db.commit()
-    db.refresh(new_category)
+    await db.commit()
+    await db.refresh(new_category)
+    await category_cache.invalidate()
+    broker.publish("catalog.changed", since=new_category.revision - 1, revision=new_category.revision,
+                   category_ids=[new_category.id])
     return new_category
 
-@router.get("/", response_model=List[CategoryResponse])
-def get_categories(
-    db: Session = Depends(get_db), 
+@router.get(
+    "/", response_model=List[CategoryResponse],
+    dependencies=[Depends(revision_etag(revisions.CATALOG))]
+)
+async def get_categories(
+    request: Request,
+    response: Response,
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user)
 ):
-    return db.query(Category).all()
\ No newline at end of file
+    # La versión del catálogo (leída para el ETag) es parte de la clave: nunca se sirve
+    # un listado anterior al ETag, aunque otro worker haya hecho la escritura
+    cache_key = str(request.state.revisions.get(revisions.CATALOG, 0))
+    body = await category_cache.get(cache_key)
+    if body is None:
+        categories = (await db.execute(select(Category))).scalars().all()
+        body = formats.encode(
+            [CategoryResponse.model_validate(category).model_dump() for category in categories], formats.JSON
+        )
+        await category_cache.set(cache_key, body)
+    return Response(content=body, media_type=formats.JSON, headers=dict(response.headers))
@@ -1,42 +1,43 @@
 from fastapi import APIRouter, Depends
-from sqlalchemy.orm import Session
-from datetime import datetime
-from database import get_db
+from sqlalchemy import case, func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from database import get_async_db
 from auth import get_current_user
 from models.user import User
-from models.sale import Sale
 from models.product import Product
+from models.daily_sales_summary import DailySalesSummary
 from utils import get_local_now
+from conditional import revision_etag
+import revisions
 
 router = APIRouter(prefix="/dashboard", tags=["dashboard"])
 
-@router.get("/stats")
-def get_dashboard_stats(
-    db: Session = Depends(get_db), 
+# Cambia con las ventas (resumen diario), con el catálogo (stock bajo) y con el día
+@router.get(
+    "/stats",
+    dependencies=[Depends(revision_etag(revisions.SALES, revisions.CATALOG, daily=True))]
+)
+async def get_dashboard_stats(
+    db: AsyncSession = Depends(get_async_db), 
     current_user: User = Depends(get_current_user)
 ):
     today_date = get_local_now().date()
     
-    # Ventas de hoy
-    today_sales = db.query(Sale).filter(
-        Sale.created_at >= datetime.combine(today_date, datetime.min.time()).replace(tzinfo=get_local_now().tzinfo)
-    ).all()
+    # Ventas de hoy (desde el resumen diario que mantiene cada venta)
+    today_revenue, today_count = (await db.execute(select(
+        func.coalesce(func.sum(DailySalesSummary.revenue), 0.0),
+        func.coalesce(func.sum(DailySalesSummary.sales_count), 0)
+    ).where(DailySalesSummary.sales_date == today_date))).one()
     
-    today_revenue = sum(sale.total for sale in today_sales)
-    today_count = len(today_sales)
-    
-    # Total de productos
-    total_products = db.query(Product).filter(Product.is_active == True).count()
-    
-    # Productos con stock bajo
-    low_stock = db.query(Product).filter(
-        Product.is_active == True,
-        Product.stock < 10
-    ).count()
+    # Total de productos y productos con stock bajo, en una sola consulta
+    total_products, low_stock = (await db.execute(select(
+        func.count(Product.id),
+        func.coalesce(func.sum(case((Product.stock < 10, 1), else_=0)), 0)
+    ).where(Product.is_active == True))).one()
     
     return {
         "today_revenue": today_revenue,
         "today_sales_count": today_count,
         "total_products": total_products,
         "low_stock_products": low_stock
-    }
\ No newline at end of file
+    }
@@ -0,0 +1,64 @@
+import asyncio
+from fastapi import APIRouter, HTTPException, Query, WebSocket, WebSocketDisconnect, status
+from config import EVENTS_SEND_TIMEOUT_SECONDS
+from database import AsyncSessionLocal
+from auth import authenticate_token
+from pubsub import broker, LAGGING
+import metrics
+import revisions
+
+router = APIRouter(prefix="/events", tags=["events"])
+
+async def _wait_disconnect(websocket: WebSocket):
+    """El cliente no envía mensajes: solo se espera a que cierre la conexión"""
+    while True:
+        message = await websocket.receive()
+        if message["type"] == "websocket.disconnect":
+            return
+
+async def _send_events(websocket: WebSocket, queue: asyncio.Queue):
+    while True:
+        payload = await queue.get()
+        if payload is LAGGING:
+            # 1013 (try again later): reconectar y pedir /catalog/changes desde la última versión
+            await websocket.close(code=status.WS_1013_TRY_AGAIN_LATER, reason="lagging")
+            return
+        await asyncio.wait_for(websocket.send_text(payload), EVENTS_SEND_TIMEOUT_SECONDS)
+
+# ✅ EVENTOS EN TIEMPO REAL (ventas y stock)
+# Los navegadores no envían cabeceras en un WebSocket: el access token va en ?token=
+@router.websocket("/ws")
+async def events_websocket(websocket: WebSocket, token: str = Query(...)):
+    # La sesión de BD solo se usa para autenticar: no queda ocupada mientras dure el socket
+    async with AsyncSessionLocal() as db:
+        try:
+            await authenticate_token(db, token)
+        except HTTPException:
+            await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
+            return
+        revision = (await db.execute(revisions.current_statement())).scalar_one_or_none() or 0
+
+    await websocket.accept()
+    queue = broker.subscribe()
+    tasks = set()
+    try:
+        # Versión actual del catálogo: los eventos siguientes la continúan
+        await websocket.send_json({"type": "hello", "revision": revision})
+        tasks = {
+            asyncio.create_task(_wait_disconnect(websocket)),
+            asyncio.create_task(_send_events(websocket, queue)),
+        }
+        done, _ = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+        for task in done:
+            task.result()
+    except asyncio.TimeoutError:
+        # El cliente no lee (send bloqueado): se cierra igual que si se hubiera atrasado
+        metrics.increment("events.lagging_clients")
+        await websocket.close(code=status.WS_1013_TRY_AGAIN_LATER, reason="lagging")
+    except (WebSocketDisconnect, RuntimeError):
+        # Cliente desconectado mientras se enviaba
+        pass
+    finally:
+        broker.unsubscribe(queue)
+        for task in tasks:
+            task.cancel()
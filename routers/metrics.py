@@ -0,0 +1,10 @@
+from fastapi import APIRouter, Depends
+from auth import get_current_user
+from models.user import User
+import metrics
+
+router = APIRouter(prefix="/metrics", tags=["metrics"])
+
+@router.get("/")
+def get_metrics(current_user: User = Depends(get_current_user)):
+    return metrics.snapshot()
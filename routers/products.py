@@ -1,19 +1,37 @@
-import base64
-from fastapi import APIRouter, Depends, HTTPException, status, File, UploadFile, Form
-from sqlalchemy.orm import Session
-from typing import List, Optional
-from database import get_db
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, status, File, UploadFile, Form, Query, Request, Response
+from fastapi.responses import FileResponse
+from sqlalchemy import select, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Literal, Optional
+from urllib.parse import urlencode
+from config import IMAGE_CACHE_MAX_AGE, PRODUCTS_PAGE_SIZE, PRODUCTS_MAX_PAGE_SIZE, BARCODE_BATCH_MAX
+from database import get_async_db, serialized_write
 from auth import get_current_user
 from models.user import User
 from models.product import Product
 from models.category import Category
-from schemas.product import ProductCreate, ProductResponse, ProductUpdate
+from schemas.product import (
+    ProductCreate, ProductResponse, ProductUpdate, ProductListItem,
+    BarcodeLookupRequest, BarcodeLookupResponse,
+)
+from cache import barcode_cache, product_list_cache
+from utils import encode_cursor, decode_cursor
+import search as product_search
+import formats
+import storage
+import revisions
+from pubsub import broker
+from conditional import etag_matches, revision_etag
 
 router = APIRouter(prefix="/products", tags=["products"])
 
 # ✅ CREAR PRODUCTO
-@router.post("/", response_model=ProductResponse, status_code=status.HTTP_201_CREATED)
+@router.post(
+    "/", response_model=ProductResponse, status_code=status.HTTP_201_CREATED,
+    dependencies=[Depends(serialized_write)]
+)
 async def create_product(
+    background_tasks: BackgroundTasks,
     name: str = Form(...),
     price: float = Form(...),
     cost: float = Form(0),
@@ -23,25 +41,27 @@ async def create_product(
     barcode: Optional[str] = Form(None),
     unidad_medida: Optional[str] = Form(None),
     image: Optional[UploadFile] = File(None),
-    db: Session = Depends(get_db), 
+    db: AsyncSession = Depends(get_async_db), 
     current_user: User = Depends(get_current_user)
 ):
     # Verificar categoría
-    category = db.query(Category).filter(Category.id == category_id).first()
+    category = await db.get(Category, category_id)
     if not category:
         raise HTTPException(status_code=404, detail="Category not found")
 
     # Verificar código de barras único
     if barcode:
-        existing = db.query(Product).filter(Product.barcode == barcode).first()
+        existing = (await db.execute(select(Product.id).where(Product.barcode == barcode))).first()
         if existing:
             raise HTTPException(status_code=400, detail="Barcode already exists")
 
     # Procesar imagen
-    image_base64 = None
+    image_hash = None
     if image:
         contents = await image.read()
-        image_base64 = base64.b64encode(contents).decode("utf-8")
+        if contents:
+            image_hash = storage.save_image(contents)
+            background_tasks.add_task(storage.generate_variants, image_hash)
 
     new_product = Product(
         name=name,
@@ -51,67 +71,255 @@ async def create_product(
         stock=stock,
         barcode=barcode,
         category_id=category_id,
-        image_base64=image_base64,
+        image_hash=image_hash,
         unidad_medida=unidad_medida  # 👈 ESTO FALTABA
     )
+    new_product.revision = await db.run_sync(revisions.bump)
 
     db.add(new_product)
-    db.commit()
-    db.refresh(new_product)
+    await db.commit()
+    await db.refresh(new_product)
+    if barcode:
+        barcode_cache.delete(barcode)
+    await product_list_cache.invalidate()
+    broker.publish("catalog.changed", since=new_product.revision - 1, revision=new_product.revision,
+                   product_ids=[new_product.id])
     return new_product
 
 
-# ✅ LISTAR PRODUCTOS
-@router.get("/", response_model=List[ProductResponse])
-def get_products(
-    skip: int = 0,
-    limit: int = 9999999,
+# Campos que se pueden pedir con ?fields= en el listado
+PRODUCT_LIST_FIELDS = (
+    "id", "name", "description", "price", "cost", "stock", "barcode",
+    "unidad_medida", "category_id", "is_active", "image_hash", "image_url",
+)
+
+
+# Entrada de product_list_cache: cursor de la página siguiente (puede ser vacío) + cuerpo
+def _pack_page(next_cursor: Optional[str], body: bytes) -> bytes:
+    return (next_cursor or "").encode("ascii") + b"\n" + body
+
+
+def _unpack_page(value: bytes):
+    next_cursor, _, body = value.partition(b"\n")
+    return next_cursor.decode("ascii") or None, body
+
+
+# ✅ LISTAR PRODUCTOS (paginación por cursor: ver cabecera X-Next-Cursor)
+@router.get(
+    "/", response_model=List[ProductListItem], response_model_exclude_unset=True,
+    dependencies=[Depends(revision_etag(revisions.CATALOG, negotiated=True))]
+)
+async def get_products(
+    request: Request,
+    response: Response,
+    skip: int = Query(0, ge=0, deprecated=True),
+    limit: int = Query(PRODUCTS_PAGE_SIZE, ge=1, le=PRODUCTS_MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    order_by: Literal["name", "id"] = "name",
+    fields: Optional[str] = None,
     search: Optional[str] = None,
     category_id: Optional[int] = None,
     is_active: Optional[bool] = True,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user)
 ):
-    query = db.query(Product)
+    media_type = formats.negotiate(request.headers.get("accept"))
+    # Página ya serializada para esta versión del catálogo (leída para el ETag), formato y parámetros
+    cache_key = ":".join([
+        str(request.state.revisions.get(revisions.CATALOG, 0)),
+        media_type,
+        urlencode(sorted(request.query_params.multi_items())),
+    ])
+    cached = await product_list_cache.get(cache_key)
+    if cached is not None:
+        next_cursor, body = _unpack_page(cached)
+        if next_cursor:
+            response.headers["X-Next-Cursor"] = next_cursor
+        return formats.response(body, media_type, headers=response.headers)
+
+    # Proyección: solo se seleccionan en SQL las columnas pedidas
+    if fields:
+        requested = [f.strip() for f in fields.split(",") if f.strip()]
+        unknown = [f for f in requested if f not in PRODUCT_LIST_FIELDS]
+        if unknown:
+            raise HTTPException(status_code=400, detail=f"Unknown fields: {', '.join(unknown)}")
+    else:
+        requested = list(PRODUCT_LIST_FIELDS)
+
+    sort_keys = ["name", "id"] if order_by == "name" else ["id"]
+    selected = [f for f in requested if f != "image_url"]
+    if "image_url" in requested:
+        selected += ["id", "image_hash"]
+    selected = list(dict.fromkeys(selected + sort_keys + ["id"]))
+
+    query = select(*[getattr(Product, f) for f in selected])
 
     if is_active is not None:
-        query = query.filter(Product.is_active == is_active)
+        query = query.where(Product.is_active == is_active)
     if category_id:
-        query = query.filter(Product.category_id == category_id)
+        query = query.where(Product.category_id == category_id)
+
+    sort_columns = [getattr(Product, f) for f in sort_keys]
     if search:
-        query = query.filter(Product.name.contains(search))
+        # Con búsqueda los resultados se ordenan por relevancia
+        query, rank = product_search.apply_search(query, search)
+        if rank is not None:
+            query = query.add_columns(rank)
+            selected.append("search_rank")
+            sort_keys = ["search_rank", "id"]
+            sort_columns = [rank, Product.id]
+
+    if cursor:
+        try:
+            last_values = decode_cursor(cursor)
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+        if len(last_values) != len(sort_columns):
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+        query = query.where(tuple_(*sort_columns) > tuple_(*last_values))
+    elif skip:
+        query = query.offset(skip)
+
+    rows = (await db.execute(query.order_by(*sort_columns).limit(limit))).all()
 
-    products = query.offset(skip).limit(limit).all()
+    products = []
+    for row in rows:
+        values = dict(zip(selected, row))
+        item = {f: values[f] for f in requested if f != "image_url"}
+        if "image_url" in requested:
+            item["image_url"] = storage.image_url(values["id"], values["image_hash"])
+        products.append(item)
 
-    # 🔹 Convertir imágenes a base64 string legible (ya deberían estar en texto, pero aseguramos)
-    for p in products:
-        if isinstance(p.image_base64, bytes):
-            p.image_base64 = base64.b64encode(p.image_base64).decode("utf-8")
+    next_cursor = None
+    if len(rows) == limit:
+        last = dict(zip(selected, rows[-1]))
+        next_cursor = encode_cursor([last[f] for f in sort_keys])
+        response.headers["X-Next-Cursor"] = next_cursor
 
-    return products
+    # Se serializa directamente (response_model queda solo para la documentación),
+    # en JSON o en el formato compacto pedido con Accept
+    body = formats.encode(products, media_type, requested)
+    await product_list_cache.set(cache_key, _pack_page(next_cursor, body))
+    return formats.response(body, media_type, headers=response.headers)
+
+
+# ✅ BUSCAR PRODUCTO POR CÓDIGO DE BARRAS (lector de la caja)
+@router.get("/by-barcode/{code}", response_model=ProductResponse)
+async def get_product_by_barcode(
+    code: str,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(get_current_user)
+):
+    cached = barcode_cache.get(code)
+    if cached is not None:
+        return cached
+
+    product = (await db.execute(
+        select(Product).where(Product.barcode == code, Product.is_active == True)
+    )).scalars().first()
+    if not product:
+        raise HTTPException(status_code=404, detail="Product not found")
+
+    result = ProductResponse.model_validate(product)
+    barcode_cache.set(code, result)
+    return result
+
+
+# ✅ BUSCAR VARIOS CÓDIGOS DE BARRAS EN UNA SOLA PETICIÓN
+@router.post("/by-barcode", response_model=BarcodeLookupResponse)
+async def get_products_by_barcodes(
+    lookup: BarcodeLookupRequest,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(get_current_user)
+):
+    codes = list(dict.fromkeys(lookup.barcodes))
+    if len(codes) > BARCODE_BATCH_MAX:
+        raise HTTPException(status_code=400, detail=f"At most {BARCODE_BATCH_MAX} barcodes per request")
+
+    found = {}
+    pending = []
+    for code in codes:
+        cached = barcode_cache.get(code)
+        if cached is not None:
+            found[code] = cached
+        else:
+            pending.append(code)
+
+    if pending:
+        products = (await db.execute(select(Product).where(
+            Product.barcode.in_(pending), Product.is_active == True
+        ))).scalars().all()
+        for product in products:
+            result = ProductResponse.model_validate(product)
+            barcode_cache.set(product.barcode, result)
+            found[product.barcode] = result
+
+    return {
+        "products": [found[code] for code in codes if code in found],
+        "missing": [code for code in codes if code not in found],
+    }
 
 
 # ✅ OBTENER PRODUCTO POR ID
-@router.get("/{product_id}", response_model=ProductResponse)
-def get_product(
+@router.get(
+    "/{product_id}", response_model=ProductResponse,
+    dependencies=[Depends(revision_etag(revisions.CATALOG))]
+)
+async def get_product(
     product_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user)
 ):
-    product = db.query(Product).filter(Product.id == product_id).first()
+    product = await db.get(Product, product_id)
     if not product:
         raise HTTPException(status_code=404, detail="Product not found")
 
-    # 🔹 Asegurar que la imagen esté en formato base64 string
-    if isinstance(product.image_base64, bytes):
-        product.image_base64 = base64.b64encode(product.image_base64).decode("utf-8")
-
     return product
 
+
+# ✅ IMAGEN DEL PRODUCTO
+# Sin autenticación para que las terminales puedan usarla directamente en <img src>.
+# variant=thumb para la grilla, variant=detail para la vista de detalle.
+@router.get("/{product_id}/image")
+async def get_product_image(
+    product_id: int,
+    request: Request,
+    v: Optional[str] = None,
+    variant: Literal["original", "thumb", "detail"] = "original",
+    db: AsyncSession = Depends(get_async_db)
+):
+    image_hash = (await db.execute(select(Product.image_hash).where(Product.id == product_id))).scalar()
+    path = storage.get_image_path(image_hash)
+    if not path:
+        raise HTTPException(status_code=404, detail="Image not found")
+
+    # Si la variante aún no se ha generado se sirve la original, sin cachearla como definitiva
+    served = variant
+    if variant != "original":
+        variant_path = storage.get_variant_path(image_hash, variant)
+        if variant_path:
+            path = variant_path
+        else:
+            served = "original"
+
+    etag = f'"{image_hash}"' if served == "original" else f'"{image_hash}-{served}"'
+    if v == storage.image_version(image_hash) and served == variant:
+        # URL versionada (la de image_url): el contenido nunca cambia para esta URL
+        cache_control = f"public, max-age={IMAGE_CACHE_MAX_AGE}, immutable"
+    else:
+        cache_control = "no-cache"
+    headers = {"ETag": etag, "Cache-Control": cache_control}
+
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+    return FileResponse(path, media_type=storage.guess_media_type(path), headers=headers)
+
 # ✅ ACTUALIZAR PRODUCTO (COMPLETO CON unidad_medida)
-@router.put("/{product_id}", response_model=ProductResponse)
+@router.put("/{product_id}", response_model=ProductResponse, dependencies=[Depends(serialized_write)])
 async def update_product(
     product_id: int,
+    background_tasks: BackgroundTasks,
     name: Optional[str] = Form(None),
     price: Optional[float] = Form(None),
     cost: Optional[float] = Form(None),
@@ -121,17 +329,21 @@ async def update_product(
     description: Optional[str] = Form(None),
     barcode: Optional[str] = Form(None),
     image: Optional[UploadFile] = File(None),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user)
 ):
-    product = db.query(Product).filter(Product.id == product_id).first()
+    product = await db.get(Product, product_id)
     if not product:
         raise HTTPException(status_code=404, detail="Product not found")
+    previous_barcode = product.barcode
 
     # Procesar imagen nueva (si se envía)
     if image:
         contents = await image.read()
-        product.image_base64 = base64.b64encode(contents).decode("utf-8")
+        if contents:
+            product.image_hash = storage.save_image(contents)
+            product.image_base64 = None
+            background_tasks.add_task(storage.generate_variants, product.image_hash)
 
     # Actualizar otros campos
     if name is not None:
@@ -150,26 +362,48 @@ async def update_product(
         product.description = description
     if barcode is not None:
         # Verificar que no haya duplicado
-        existing = db.query(Product).filter(Product.barcode == barcode, Product.id != product_id).first()
+        existing = (await db.execute(
+            select(Product.id).where(Product.barcode == barcode, Product.id != product_id)
+        )).first()
         if existing:
             raise HTTPException(status_code=400, detail="Barcode already exists")
         product.barcode = barcode
 
-    db.commit()
-    db.refresh(product)
+    product.revision = await db.run_sync(revisions.bump)
+    await db.commit()
+    await db.refresh(product)
+    barcode_cache.delete(previous_barcode, product.barcode)
+    await product_list_cache.invalidate()
+    # Solo stock: basta con el stock nuevo. Si cambió algo más, catalog.changed para que la
+    # terminal pida el producto completo por /catalog/changes (un solo evento por versión)
+    other_fields = (name, price, cost, unidad_medida, category_id, description, barcode, image)
+    if stock is not None and all(value is None for value in other_fields):
+        broker.publish("stock.changed", since=product.revision - 1, revision=product.revision,
+                       products=[{"id": product.id, "stock": product.stock}])
+    else:
+        broker.publish("catalog.changed", since=product.revision - 1, revision=product.revision,
+                       product_ids=[product.id])
     return product
 
 # ✅ ELIMINAR (DESACTIVAR) PRODUCTO
-@router.delete("/{product_id}", status_code=status.HTTP_204_NO_CONTENT)
-def delete_product(
+@router.delete(
+    "/{product_id}", status_code=status.HTTP_204_NO_CONTENT,
+    dependencies=[Depends(serialized_write)]
+)
+async def delete_product(
     product_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user)
 ):
-    product = db.query(Product).filter(Product.id == product_id).first()
+    product = await db.get(Product, product_id)
     if not product:
         raise HTTPException(status_code=404, detail="Product not found")
 
     product.is_active = False
-    db.commit()
+    product.revision = await db.run_sync(revisions.bump)
+    await db.commit()
+    barcode_cache.delete(product.barcode)
+    await product_list_cache.invalidate()
+    broker.publish("catalog.changed", since=product.revision - 1, revision=product.revision,
+                   product_ids=[product.id])
     return None
@@ -0,0 +1,143 @@
+from fastapi import APIRouter, Depends, HTTPException, Response
+from sqlalchemy import distinct, func, literal, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Literal, Optional
+from datetime import date, datetime, time, timedelta
+from config import REPORTS_MAX_HOURLY_DAYS, REPORTS_CACHE_MAX_AGE, REPORTS_CLOSED_CACHE_MAX_AGE
+from database import get_async_db
+from auth import get_current_user
+from models.user import User
+from models.sale import Sale, SaleItem
+from models.product import Product
+from models.category import Category
+from schemas.report import SalesReportResponse
+from utils import get_local_now
+
+router = APIRouter(prefix="/reports", tags=["reports"])
+
+# Formato de cada periodo en SQLite / MySQL (PostgreSQL usa date_trunc)
+_SQLITE_BUCKETS = {
+    "hour": lambda col: func.strftime("%Y-%m-%dT%H:00", col),
+    "day": lambda col: func.date(col),
+    "week": lambda col: func.date(col, "weekday 0", "-6 days"),  # lunes de la semana
+    "month": lambda col: func.strftime("%Y-%m-01", col),
+}
+_MYSQL_BUCKETS = {
+    "hour": lambda col: func.date_format(col, "%Y-%m-%dT%H:00"),
+    "day": lambda col: func.date_format(col, "%Y-%m-%d"),
+    "week": lambda col: func.date_format(func.subdate(col, func.weekday(col)), "%Y-%m-%d"),
+    "month": lambda col: func.date_format(col, "%Y-%m-01"),
+}
+
+def _bucket_expression(dialect: str, group_by: str, column):
+    if dialect == "postgresql":
+        return func.date_trunc(group_by, column)
+    if dialect == "mysql":
+        return _MYSQL_BUCKETS[group_by](column)
+    return _SQLITE_BUCKETS[group_by](column)
+
+def _format_bucket(value, group_by: str) -> str:
+    if isinstance(value, datetime):
+        return value.strftime("%Y-%m-%dT%H:00" if group_by == "hour" else "%Y-%m-%d")
+    if isinstance(value, date):
+        return value.isoformat()
+    return str(value)
+
+# ✅ REPORTE DE VENTAS AGRUPADO POR PERIODO (todo se agrega en SQL)
+@router.get("/sales", response_model=SalesReportResponse)
+async def get_sales_report(
+    response: Response,
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+    group_by: Literal["hour", "day", "week", "month"] = "day",
+    by: Optional[Literal["product", "category", "user", "payment_method"]] = None,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(get_current_user)
+):
+    # Fechas en la zona horaria de config.TIMEZONE (últimos 30 días por defecto)
+    today = get_local_now().date()
+    end_date = end_date or today
+    start_date = start_date or end_date - timedelta(days=29)
+    if start_date > end_date:
+        raise HTTPException(status_code=400, detail="start_date must be before end_date")
+    if group_by == "hour" and (end_date - start_date).days >= REPORTS_MAX_HOURLY_DAYS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Hourly reports are limited to {REPORTS_MAX_HOURLY_DAYS} days"
+        )
+
+    # created_at se guarda en hora local, así que se compara con límites locales sin zona
+    start = datetime.combine(start_date, time.min)
+    end = datetime.combine(end_date + timedelta(days=1), time.min)
+
+    bucket = _bucket_expression(db.bind.dialect.name, group_by, Sale.created_at).label("bucket")
+
+    if by in ("product", "category"):
+        # Por producto o categoría se suman los items (antes del descuento de la venta)
+        if by == "product":
+            key, label = SaleItem.product_id, Product.name
+        else:
+            key, label = Product.category_id, Category.name
+        revenue = func.sum(SaleItem.subtotal)
+        query = select(
+            bucket,
+            key.label("key"),
+            label.label("label"),
+            revenue.label("revenue"),
+            func.count(distinct(Sale.id)).label("sales_count"),
+            func.sum(SaleItem.quantity).label("units"),
+        ).select_from(SaleItem).join(Sale, SaleItem.sale_id == Sale.id)
+        query = query.outerjoin(Product, SaleItem.product_id == Product.id)
+        if by == "category":
+            query = query.outerjoin(Category, Product.category_id == Category.id)
+    else:
+        if by == "user":
+            key, label = Sale.user_id, User.full_name
+        elif by == "payment_method":
+            key, label = Sale.payment_method, Sale.payment_method
+        else:
+            key, label = literal(None), literal(None)
+        revenue = func.sum(Sale.total)
+        query = select(
+            bucket,
+            key.label("key"),
+            label.label("label"),
+            revenue.label("revenue"),
+            func.count(Sale.id).label("sales_count"),
+            literal(None).label("units"),
+        ).select_from(Sale)
+        if by == "user":
+            query = query.outerjoin(User, Sale.user_id == User.id)
+
+    in_range = (Sale.created_at >= start, Sale.created_at < end)
+    group_columns = [bucket] if by is None else [bucket, key, label]
+    query = query.where(*in_range).group_by(*group_columns).order_by(bucket, revenue.desc())
+    rows = (await db.execute(query)).all()
+
+    total_revenue, total_sales = (await db.execute(select(
+        func.coalesce(func.sum(Sale.total), 0.0), func.count(Sale.id)
+    ).where(*in_range))).one()
+
+    # Los periodos cerrados cambian poco (solo por ventas sincronizadas tarde)
+    max_age = REPORTS_CLOSED_CACHE_MAX_AGE if end_date < today else REPORTS_CACHE_MAX_AGE
+    response.headers["Cache-Control"] = f"private, max-age={max_age}"
+
+    return {
+        "start_date": start_date,
+        "end_date": end_date,
+        "group_by": group_by,
+        "by": by,
+        "total_revenue": total_revenue,
+        "total_sales": total_sales,
+        "rows": [
+            {
+                "bucket": _format_bucket(row.bucket, group_by),
+                "key": str(row.key) if row.key is not None else None,
+                "label": row.label,
+                "revenue": row.revenue or 0.0,
+                "sales_count": row.sales_count,
+                "units": row.units,
+            }
+            for row in rows
+        ],
+    }
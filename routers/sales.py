@@ -1,33 +1,73 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session, joinedload
-from typing import List, Optional
+import csv
+import io
+import json
+import logging
+from fastapi import APIRouter, Depends, Header, HTTPException, Request, Response, status
+from fastapi.responses import StreamingResponse
+from sqlalchemy import case, select, update
+from sqlalchemy.exc import IntegrityError, SQLAlchemyError
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, joinedload, selectinload
+from typing import List, Literal, Optional
 from datetime import datetime
-from database import get_db
+from config import TIMEZONE, SALES_BATCH_MAX, SALES_EXPORT_CHUNK_SIZE
+from database import get_db, get_async_db, serialized_write, ReadSessionLocal
 from auth import get_current_user
 from models.user import User
 from models.sale import Sale, SaleItem
 from models.product import Product
-from schemas.sale import SaleCreate, SaleResponse, SaleWithUserResponse
-from schemas.user import UserSimple
+from schemas.sale import SaleCreate, SaleResponse, SaleWithUserResponse, SaleBatchCreate, SaleBatchResponse
 from utils import get_local_now
+from cache import barcode_cache
+import formats
+import sales_summary
+import revisions
+from pubsub import broker
+
+logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/sales", tags=["sales"])
 
-@router.post("/", response_model=SaleResponse, status_code=status.HTTP_201_CREATED)
-def create_sale(
-    sale: SaleCreate, 
-    db: Session = Depends(get_db), 
-    current_user: User = Depends(get_current_user)
-):
-    # Validar productos y stock
-    subtotal = 0
+def _load_products(db: Session, product_ids):
+    """Carga en una sola consulta los productos de la venta, bloqueando sus filas (FOR UPDATE) si la BD lo soporta"""
+    products = db.query(Product).filter(Product.id.in_(list(product_ids))).with_for_update().all()
+    return {product.id: product for product in products}
+
+def _decrement_stock(db: Session, quantities: dict, revision: int) -> bool:
+    """Descuenta el stock de todos los productos en una sola sentencia; False si alguno no alcanza"""
+    amount = case(quantities, value=Product.id)
+    result = db.execute(
+        update(Product)
+        .where(Product.id.in_(list(quantities)), Product.stock >= amount)
+        .values(stock=Product.stock - amount, revision=revision)
+        .execution_options(synchronize_session=False)
+    )
+    return result.rowcount == len(quantities)
+
+def _register_sale(db: Session, sale: SaleCreate, user_id: int, client_sale_id: Optional[str],
+                   products: dict, stock: dict, created_at: Optional[datetime] = None) -> tuple:
+    """
+    Valida y registra una venta con sus items y descuenta el stock.
+    products y stock vienen de _load_products; stock se actualiza con lo vendido.
+    Devuelve (venta, versión del catálogo en que cambió el stock).
+    Lanza HTTPException si la venta no es válida (sin confirmar la transacción).
+    """
+    if not sale.items:
+        raise HTTPException(status_code=400, detail="Sale has no items")
+
+    # Cantidad total por producto (un producto puede venir en varias líneas)
+    quantities = {}
     for item in sale.items:
-        product = db.query(Product).filter(Product.id == item.product_id).first()
+        quantities[item.product_id] = quantities.get(item.product_id, 0) + item.quantity
+
+    # Validar productos y stock
+    for product_id, quantity in quantities.items():
+        product = products.get(product_id)
         if not product:
-            raise HTTPException(status_code=404, detail=f"Product {item.product_id} not found")
-        if product.stock < item.quantity:
+            raise HTTPException(status_code=404, detail=f"Product {product_id} not found")
+        if stock[product_id] < quantity:
             raise HTTPException(status_code=400, detail=f"Insufficient stock for {product.name}")
-        subtotal += item.price * item.quantity
+    subtotal = sum(item.price * item.quantity for item in sale.items)
     
     # Calcular totales
 
@@ -35,7 +75,7 @@ def create_sale(
     
     # Crear venta
     new_sale = Sale(
-        user_id=current_user.id,
+        user_id=user_id,
         subtotal=subtotal,
         tax=0,
         discount=sale.discount,
@@ -43,112 +83,193 @@ def create_sale(
         payment_method=sale.payment_method,
         customer_name=sale.customer_name,
         customer_email=sale.customer_email,
-        notes=sale.notes
+        notes=sale.notes,
+        client_sale_id=client_sale_id
     )
+    if created_at:
+        new_sale.created_at = created_at
     db.add(new_sale)
     db.flush()
     
-    # Crear items de venta y actualizar stock
-    for item in sale.items:
-        sale_item = SaleItem(
+    # Crear items de venta
+    db.add_all([
+        SaleItem(
             sale_id=new_sale.id,
             product_id=item.product_id,
             quantity=item.quantity,
             price=item.price,
             subtotal=item.price * item.quantity
         )
-        db.add(sale_item)
-        
-        # Actualizar stock del producto
-        product = db.query(Product).filter(Product.id == item.product_id).first()
-        product.stock -= item.quantity
+        for item in sale.items
+    ])
+
+    # Actualizar stock; la condición stock >= cantidad evita vender de más
+    # aunque otra venta concurrente haya descontado stock entre tanto
+    revision = revisions.bump(db)
+    if not _decrement_stock(db, quantities, revision):
+        raise HTTPException(status_code=409, detail="Insufficient stock, please retry the sale")
+    for product_id, quantity in quantities.items():
+        stock[product_id] -= quantity
+
+    # Resumen diario del dashboard, en la misma transacción
+    sales_summary.record_sale(db, new_sale)
+    revisions.bump(db, revisions.SALES)
+    return new_sale, revision
+
+def _sale_event(sale: Sale) -> dict:
+    """Datos del evento sale.created; se arman antes del commit, que expira los atributos"""
+    return {
+        "sale_id": sale.id, "total": sale.total, "payment_method": sale.payment_method,
+        "user_id": sale.user_id, "created_at": sale.created_at,
+    }
+
+def _publish_sales(sale_events: list, stock: dict, product_ids: set, since: int, revision: int):
+    """
+    Avisa a los clientes conectados (después del commit) de las ventas y del stock nuevo.
+    since es la versión anterior a la primera venta: el evento cubre (since, revision].
+    """
+    if not len(broker):
+        return
+    for event in sale_events:
+        broker.publish("sale.created", **event)
+    broker.publish(
+        "stock.changed", since=since, revision=revision,
+        products=[{"id": product_id, "stock": stock[product_id]} for product_id in sorted(product_ids)]
+    )
+
+def _client_sale_id(sale: SaleCreate, idempotency_key: Optional[str] = None) -> Optional[str]:
+    if idempotency_key:
+        return idempotency_key
+    return str(sale.client_sale_id) if sale.client_sale_id else None
+
+@router.post(
+    "/", response_model=SaleResponse, status_code=status.HTTP_201_CREATED,
+    dependencies=[Depends(serialized_write)]
+)
+def create_sale(
+    sale: SaleCreate, 
+    response: Response,
+    idempotency_key: Optional[str] = Header(None, max_length=64),
+    db: Session = Depends(get_db), 
+    current_user: User = Depends(get_current_user)
+):
+    # Reintento de una venta ya registrada: se devuelve la original sin tocar el stock
+    client_sale_id = _client_sale_id(sale, idempotency_key)
+    if client_sale_id:
+        existing = db.query(Sale).filter(Sale.client_sale_id == client_sale_id).first()
+        if existing:
+            response.status_code = status.HTTP_200_OK
+            return existing
+
+    products = _load_products(db, {item.product_id for item in sale.items})
+    stock = {product_id: product.stock for product_id, product in products.items()}
+    try:
+        new_sale, revision = _register_sale(db, sale, current_user.id, client_sale_id, products, stock)
+    except IntegrityError:
+        db.rollback()
+        # Sin clave no puede ser un reintento: es otro error de integridad
+        if not client_sale_id:
+            raise
+        # Otro reintento con la misma clave se registró al mismo tiempo
+        existing = db.query(Sale).filter(Sale.client_sale_id == client_sale_id).first()
+        if not existing:
+            raise
+        response.status_code = status.HTTP_200_OK
+        return existing
+    sold_barcodes = [products[item.product_id].barcode for item in sale.items]
+    sale_event = _sale_event(new_sale)
     
     db.commit()
     db.refresh(new_sale)
+    # El stock cambió: las respuestas cacheadas por código de barras ya no sirven
+    barcode_cache.delete(*sold_barcodes)
+    _publish_sales([sale_event], stock, {item.product_id for item in sale.items}, revision - 1, revision)
     return new_sale
 
-@router.get("/", response_model=List[SaleWithUserResponse])
-def get_sales(
-    skip: int = 0,
-    limit: int = 100,
-    start_date: Optional[datetime] = None,
-    end_date: Optional[datetime] = None,
-    today: bool = False,
+# ✅ SINCRONIZAR VENTAS HECHAS SIN CONEXIÓN
+@router.post("/batch", response_model=SaleBatchResponse, dependencies=[Depends(serialized_write)])
+def create_sales_batch(
+    batch: SaleBatchCreate,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
-    query = db.query(Sale).options(
-        joinedload(Sale.user),
-        joinedload(Sale.items).joinedload(SaleItem.product)
-    )
+    if len(batch.sales) > SALES_BATCH_MAX:
+        raise HTTPException(status_code=400, detail=f"At most {SALES_BATCH_MAX} sales per batch")
 
-    # Filtrar por fecha
-    if start_date:
-        query = query.filter(Sale.created_at >= start_date)
-    if end_date:
-        query = query.filter(Sale.created_at <= end_date)
+    # Ventas ya sincronizadas en un envío anterior (una sola consulta)
+    keys = [key for key in (_client_sale_id(sale) for sale in batch.sales) if key]
+    registered = dict(
+        db.query(Sale.client_sale_id, Sale.id).filter(Sale.client_sale_id.in_(keys)).all()
+    ) if keys else {}
 
-    # Filtrar por día actual
-    if today:
-        today_date = get_local_now().date()
-        start_of_day = datetime.combine(today_date, datetime.min.time()).replace(tzinfo=get_local_now().tzinfo)
-        end_of_day = datetime.combine(today_date, datetime.max.time()).replace(tzinfo=get_local_now().tzinfo)
-        query = query.filter(Sale.created_at >= start_of_day, Sale.created_at <= end_of_day)
+    # Todos los productos del lote en una sola consulta
+    products = _load_products(db, {item.product_id for sale in batch.sales for item in sale.items})
+    stock = {product_id: product.stock for product_id, product in products.items()}
 
-    sales = query.order_by(Sale.created_at.desc()).offset(skip).limit(limit).all()
-    
-    # Convertir a formato que Pydantic pueda serializar
-    result = []
-    for sale in sales:
-        sale_dict = {
-            "id": sale.id,
-            "total": sale.total,
-            "subtotal": sale.subtotal,
-            "tax": sale.tax,
-            "discount": sale.discount,
-            "payment_method": sale.payment_method,
-            "customer_name": sale.customer_name,
-            "customer_email": sale.customer_email,
-            "notes": sale.notes,
-            "created_at": sale.created_at,
-            "user": UserSimple(
-                id=sale.user.id,
-                username=sale.user.username,
-                full_name=sale.user.full_name,
-                email=sale.user.email
-            ) if sale.user else None,
-            "items": [
-                {
-                    "id": item.id,
-                    "product_id": item.product_id,
-                    "quantity": item.quantity,
-                    "price": item.price,
-                    "subtotal": item.subtotal,
-                    "product_name": item.product.name if item.product else None
-                }
-                for item in sale.items
-            ]
-        }
-        result.append(sale_dict)
-    
-    return result
+    # Cada venta en su propio SAVEPOINT: una venta inválida no invalida el lote
+    results = []
+    sold_barcodes = set()
+    sale_events = []
+    sold_product_ids = set()
+    for index, sale in enumerate(batch.sales):
+        client_sale_id = _client_sale_id(sale)
+        if client_sale_id in registered:
+            results.append({"index": index, "status": "duplicate", "client_sale_id": client_sale_id,
+                            "sale_id": registered[client_sale_id]})
+            continue
 
-@router.get("/{sale_id}", response_model=SaleWithUserResponse)
-def get_sale(
-    sale_id: int, 
-    db: Session = Depends(get_db), 
-    current_user: User = Depends(get_current_user)
-):
-    sale = db.query(Sale).options(
-        joinedload(Sale.user),
-        joinedload(Sale.items).joinedload(SaleItem.product)
-    ).filter(Sale.id == sale_id).first()
-    
-    if not sale:
-        raise HTTPException(status_code=404, detail="Sale not found")
-    
-    # Convertir a formato que Pydantic pueda serializar
-    sale_response = {
+        created_at = None
+        if sale.client_created_at:
+            created_at = sale.client_created_at
+            if created_at.tzinfo:
+                created_at = created_at.astimezone(TIMEZONE)
+
+        savepoint_stock = dict(stock)
+        try:
+            with db.begin_nested():
+                new_sale, revision = _register_sale(db, sale, current_user.id, client_sale_id,
+                                                    products, savepoint_stock, created_at)
+        except HTTPException as exc:
+            results.append({"index": index, "status": "error", "client_sale_id": client_sale_id,
+                            "detail": exc.detail})
+            continue
+        except IntegrityError:
+            # Registrada al mismo tiempo por otra petición con la misma clave
+            results.append({"index": index, "status": "duplicate", "client_sale_id": client_sale_id})
+            continue
+        except SQLAlchemyError:
+            # Error inesperado de la BD en esta venta: se revierte su SAVEPOINT y sigue el lote
+            logger.exception("Error registering offline sale %s (index %s)", client_sale_id, index)
+            results.append({"index": index, "status": "error", "client_sale_id": client_sale_id,
+                            "detail": "Database error"})
+            continue
+
+        stock = savepoint_stock
+        if not sale_events:
+            first_revision = revision
+        if client_sale_id:
+            registered[client_sale_id] = new_sale.id
+        sold_barcodes.update(products[item.product_id].barcode for item in sale.items)
+        sold_product_ids.update(item.product_id for item in sale.items)
+        sale_events.append(_sale_event(new_sale))
+        results.append({"index": index, "status": "created", "client_sale_id": client_sale_id,
+                        "sale_id": new_sale.id})
+
+    db.commit()
+    barcode_cache.delete(*sold_barcodes)
+    if sale_events:
+        _publish_sales(sale_events, stock, sold_product_ids, first_revision - 1, revision)
+    return {
+        "created": sum(1 for r in results if r["status"] == "created"),
+        "duplicates": sum(1 for r in results if r["status"] == "duplicate"),
+        "errors": sum(1 for r in results if r["status"] == "error"),
+        "results": results,
+    }
+
+def _sale_response(sale: Sale) -> dict:
+    """Arma la respuesta como dict plano: los datos vienen de nuestra BD y no se revalidan"""
+    user = sale.user
+    return {
         "id": sale.id,
         "total": sale.total,
         "subtotal": sale.subtotal,
@@ -158,13 +279,14 @@ def get_sale(
         "customer_name": sale.customer_name,
         "customer_email": sale.customer_email,
         "notes": sale.notes,
+        "client_sale_id": sale.client_sale_id,
         "created_at": sale.created_at,
-        "user": UserSimple(
-            id=sale.user.id,
-            username=sale.user.username,
-            full_name=sale.user.full_name,
-            email=sale.user.email
-        ) if sale.user else None,
+        "user": {
+            "id": user.id,
+            "username": user.username,
+            "full_name": user.full_name,
+            "email": user.email
+        } if user else None,
         "items": [
             {
                 "id": item.id,
@@ -177,5 +299,129 @@ def get_sale(
             for item in sale.items
         ]
     }
+
+def _sale_load_options():
+    """
+    El usuario (muchos a uno) va en el mismo SELECT; los items se cargan en una
+    segunda consulta por lote (IN), así LIMIT/OFFSET aplican a ventas y no a filas
+    ventas×items. Del producto solo se lee el nombre.
+    """
+    return (
+        joinedload(Sale.user).load_only(User.username, User.full_name, User.email),
+        selectinload(Sale.items).joinedload(SaleItem.product).load_only(Product.name),
+    )
+
+@router.get("/", response_model=List[SaleWithUserResponse])
+async def get_sales(
+    request: Request,
+    skip: int = 0,
+    limit: int = 100,
+    start_date: Optional[datetime] = None,
+    end_date: Optional[datetime] = None,
+    today: bool = False,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(get_current_user)
+):
+    query = select(Sale).options(*_sale_load_options())
+
+    # Filtrar por fecha
+    if start_date:
+        query = query.where(Sale.created_at >= start_date)
+    if end_date:
+        query = query.where(Sale.created_at <= end_date)
+
+    # Filtrar por día actual
+    if today:
+        today_date = get_local_now().date()
+        start_of_day = datetime.combine(today_date, datetime.min.time()).replace(tzinfo=get_local_now().tzinfo)
+        end_of_day = datetime.combine(today_date, datetime.max.time()).replace(tzinfo=get_local_now().tzinfo)
+        query = query.where(Sale.created_at >= start_of_day, Sale.created_at <= end_of_day)
+
+    query = query.order_by(Sale.created_at.desc()).offset(skip).limit(limit)
+    sales = (await db.execute(query)).scalars().all()
+    
+    # Se serializa directamente (response_model queda solo para la documentación),
+    # en JSON o en el formato compacto pedido con Accept
+    return formats.render(
+        [_sale_response(sale) for sale in sales],
+        formats.negotiate(request.headers.get("accept"))
+    )
+
+# Columnas de la exportación: una fila por item vendido
+EXPORT_COLUMNS = (
+    "sale_id", "created_at", "cashier", "payment_method", "customer_name",
+    "product_id", "product_name", "quantity", "price", "item_subtotal",
+    "sale_discount", "sale_total",
+)
+
+def _export_value(value):
+    return value.isoformat() if isinstance(value, datetime) else value
+
+# ✅ EXPORTAR HISTORIAL DE VENTAS (CSV o NDJSON, en streaming)
+@router.get("/export")
+def export_sales(
+    format: Literal["csv", "ndjson"] = "csv",
+    start_date: Optional[datetime] = None,
+    end_date: Optional[datetime] = None,
+    current_user: User = Depends(get_current_user)
+):
+    query = select(
+        Sale.id, Sale.created_at, User.full_name, Sale.payment_method, Sale.customer_name,
+        SaleItem.product_id, Product.name, SaleItem.quantity, SaleItem.price, SaleItem.subtotal,
+        Sale.discount, Sale.total,
+    ).select_from(SaleItem).join(Sale, SaleItem.sale_id == Sale.id).outerjoin(
+        Product, SaleItem.product_id == Product.id
+    ).outerjoin(User, Sale.user_id == User.id)
+    if start_date:
+        query = query.where(Sale.created_at >= start_date)
+    if end_date:
+        query = query.where(Sale.created_at <= end_date)
+    query = query.order_by(Sale.created_at, Sale.id, SaleItem.id).execution_options(
+        stream_results=True, yield_per=SALES_EXPORT_CHUNK_SIZE
+    )
+
+    def generate():
+        # Sesión propia: la de get_db se cierra antes de que termine el streaming
+        db = ReadSessionLocal()
+        try:
+            if format == "csv":
+                buffer = io.StringIO()
+                writer = csv.writer(buffer)
+                writer.writerow(EXPORT_COLUMNS)
+                yield buffer.getvalue()
+            # Se lee del cursor por bloques: la memoria no depende del rango de fechas
+            for rows in db.execute(query).partitions():
+                buffer = io.StringIO()
+                if format == "csv":
+                    writer = csv.writer(buffer)
+                    writer.writerows([_export_value(value) for value in row] for row in rows)
+                else:
+                    for row in rows:
+                        buffer.write(json.dumps(dict(zip(EXPORT_COLUMNS, row)), default=_export_value, ensure_ascii=False))
+                        buffer.write("\n")
+                yield buffer.getvalue()
+        finally:
+            db.close()
+
+    media_type = "text/csv" if format == "csv" else "application/x-ndjson"
+    filename = f"sales-{get_local_now():%Y%m%d-%H%M%S}.{format}"
+    return StreamingResponse(
+        generate(),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+    )
+
+@router.get("/{sale_id}", response_model=SaleWithUserResponse)
+async def get_sale(
+    sale_id: int, 
+    db: AsyncSession = Depends(get_async_db), 
+    current_user: User = Depends(get_current_user)
+):
+    sale = (await db.execute(
+        select(Sale).options(*_sale_load_options()).where(Sale.id == sale_id)
+    )).scalars().first()
+    
+    if not sale:
+        raise HTTPException(status_code=404, detail="Sale not found")
     
-    return sale_response
\ No newline at end of file
+    return formats.response(formats.encode(_sale_response(sale), formats.JSON), formats.JSON)
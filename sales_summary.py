@@ -0,0 +1,90 @@
+# sales_summary.py
+# Mantiene la tabla daily_sales_summary en la misma transacción que cada venta.
+#
+# Para reconstruirla a partir del histórico de ventas:
+#   python sales_summary.py
+
+from sqlalchemy import func
+from sqlalchemy.dialects.mysql import insert as mysql_insert
+from sqlalchemy.dialects.postgresql import insert as postgresql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.orm import Session
+from models.daily_sales_summary import DailySalesSummary
+from models.sale import Sale
+
+_UPSERT_INSERTS = {
+    "sqlite": sqlite_insert,
+    "postgresql": postgresql_insert,
+}
+
+
+def record_sale(db: Session, sale: Sale):
+    """Suma la venta al resumen de su día (la venta ya debe tener created_at)"""
+    key = {
+        "sales_date": sale.created_at.date(),
+        "user_id": sale.user_id or 0,
+        "payment_method": sale.payment_method,
+    }
+    dialect = db.get_bind().dialect.name
+
+    if dialect in _UPSERT_INSERTS:
+        stmt = _UPSERT_INSERTS[dialect](DailySalesSummary).values(**key, sales_count=1, revenue=sale.total)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=list(key),
+            set_={
+                "sales_count": DailySalesSummary.sales_count + 1,
+                "revenue": DailySalesSummary.revenue + stmt.excluded.revenue,
+            },
+        )
+        db.execute(stmt)
+    elif dialect == "mysql":
+        stmt = mysql_insert(DailySalesSummary).values(**key, sales_count=1, revenue=sale.total)
+        stmt = stmt.on_duplicate_key_update(
+            sales_count=DailySalesSummary.sales_count + 1,
+            revenue=DailySalesSummary.revenue + stmt.inserted.revenue,
+        )
+        db.execute(stmt)
+    else:
+        updated = db.query(DailySalesSummary).filter_by(**key).update({
+            DailySalesSummary.sales_count: DailySalesSummary.sales_count + 1,
+            DailySalesSummary.revenue: DailySalesSummary.revenue + sale.total,
+        }, synchronize_session=False)
+        if not updated:
+            db.add(DailySalesSummary(**key, sales_count=1, revenue=sale.total))
+            db.flush()
+
+
+def rebuild(db: Session):
+    """Recalcula todo el resumen desde la tabla sales"""
+    db.query(DailySalesSummary).delete(synchronize_session=False)
+    rows = db.query(
+        func.date(Sale.created_at),
+        func.coalesce(Sale.user_id, 0),
+        Sale.payment_method,
+        func.count(Sale.id),
+        func.coalesce(func.sum(Sale.total), 0.0),
+    ).group_by(
+        func.date(Sale.created_at), func.coalesce(Sale.user_id, 0), Sale.payment_method
+    )
+    db.execute(DailySalesSummary.__table__.insert().from_select(
+        ["sales_date", "user_id", "payment_method", "sales_count", "revenue"],
+        rows.statement,
+    ))
+    db.commit()
+    return db.query(func.count()).select_from(DailySalesSummary).scalar()
+
+
+if __name__ == "__main__":
+    from database import SessionLocal
+
+    import revisions
+
+    db = SessionLocal()
+    try:
+        rows = rebuild(db)
+        # El dashboard cambió: invalida los ETag de /dashboard/stats
+        revisions.bump(db, revisions.SALES)
+        db.commit()
+        print(f"✅ Resumen reconstruido: {rows} filas")
+    finally:
+        db.close()
@@ -0,0 +1,20 @@
+from pydantic import BaseModel
+from typing import List
+from schemas.product import ProductResponse
+from schemas.category import CategoryResponse
+
+class CatalogProduct(ProductResponse):
+    revision: int
+
+class CatalogCategory(CategoryResponse):
+    revision: int
+
+# Respuesta de GET /catalog/changes: la terminal guarda "revision" y la envía como since
+class CatalogChangesResponse(BaseModel):
+    revision: int
+    has_more: bool
+    # True si el since recibido no existe en el servidor (p. ej. base restaurada): reemplazar todo
+    reset: bool
+    products: List[CatalogProduct]
+    deactivated_product_ids: List[int]
+    categories: List[CatalogCategory]
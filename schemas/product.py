@@ -1,5 +1,5 @@
 from pydantic import BaseModel, Field
-from typing import Optional
+from typing import List, Optional
 from datetime import datetime
 
 class ProductBase(BaseModel):
@@ -30,7 +30,31 @@ class ProductUpdate(BaseModel):
 class ProductResponse(ProductBase):
     id: int
     is_active: bool
-    image_base64: Optional[str] = None
+    image_hash: Optional[str] = None
     
     class Config:
-        from_attributes = True
\ No newline at end of file
+        from_attributes = True
+
+# Fila del listado de productos: con ?fields= solo se incluyen los campos pedidos
+class ProductListItem(BaseModel):
+    id: Optional[int] = None
+    name: Optional[str] = None
+    description: Optional[str] = None
+    price: Optional[float] = None
+    cost: Optional[float] = None
+    stock: Optional[int] = None
+    barcode: Optional[str] = None
+    unidad_medida: Optional[str] = None
+    category_id: Optional[int] = None
+    is_active: Optional[bool] = None
+    image_hash: Optional[str] = None
+    image_url: Optional[str] = None
+
+
+class BarcodeLookupRequest(BaseModel):
+    barcodes: List[str] = Field(min_length=1)
+
+
+class BarcodeLookupResponse(BaseModel):
+    products: List[ProductResponse]
+    missing: List[str]
@@ -0,0 +1,20 @@
+from pydantic import BaseModel
+from typing import List, Optional
+from datetime import date
+
+class SalesReportRow(BaseModel):
+    bucket: str
+    key: Optional[str] = None
+    label: Optional[str] = None
+    revenue: float
+    sales_count: int
+    units: Optional[int] = None
+
+class SalesReportResponse(BaseModel):
+    start_date: date
+    end_date: date
+    group_by: str
+    by: Optional[str] = None
+    total_revenue: float
+    total_sales: int
+    rows: List[SalesReportRow]
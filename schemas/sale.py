@@ -1,6 +1,7 @@
 from pydantic import BaseModel, EmailStr, Field
-from typing import List, Optional
+from typing import List, Literal, Optional
 from datetime import datetime
+from uuid import UUID
 from .user import UserSimple
 
 class SaleItemBase(BaseModel):
@@ -16,7 +17,32 @@ class SaleBase(BaseModel):
     notes: Optional[str] = None
 
 class SaleCreate(SaleBase):
+    # Una venta sin items no descuenta stock ni tiene total: se rechaza con 422
+    items: List[SaleItemBase] = Field(min_length=1)
+    # Alternativa a la cabecera Idempotency-Key
+    client_sale_id: Optional[UUID] = None
+
+# Venta registrada sin conexión en la terminal, con su hora local de registro
+class SaleBatchItem(SaleCreate):
+    # Sin min_length: una venta vacía se informa como error de esa venta, no de todo el lote
     items: List[SaleItemBase]
+    client_created_at: Optional[datetime] = None
+
+class SaleBatchCreate(BaseModel):
+    sales: List[SaleBatchItem] = Field(min_length=1)
+
+class SaleBatchResult(BaseModel):
+    index: int
+    status: Literal["created", "duplicate", "error"]
+    sale_id: Optional[int] = None
+    client_sale_id: Optional[str] = None
+    detail: Optional[str] = None
+
+class SaleBatchResponse(BaseModel):
+    created: int
+    duplicates: int
+    errors: int
+    results: List[SaleBatchResult]
 
 class SaleItemResponse(SaleItemBase):
     id: int
@@ -31,6 +57,7 @@ class SaleResponse(SaleBase):
     total: float
     subtotal: float
     tax: float
+    client_sale_id: Optional[str] = None
     created_at: datetime
     user: Optional[UserSimple] = None  # ✅ Ahora usa UserSimple
     items: List[SaleItemResponse]
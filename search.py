@@ -0,0 +1,161 @@
+import logging
+import re
+import unicodedata
+from sqlalchemy import Float, Integer, and_, column, func, or_, text
+from sqlalchemy.exc import SQLAlchemyError
+from models.product import Product
+
+logger = logging.getLogger(__name__)
+
+# Backend activo: "sqlite_fts5", "postgresql_trgm" o "like" (se define en detect_backend)
+_backend = "like"
+
+_SQLITE_DDL = [
+    """
+    CREATE VIRTUAL TABLE products_fts USING fts5(
+        name, description, barcode,
+        content='products', content_rowid='id',
+        tokenize="unicode61 remove_diacritics 2"
+    )
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS products_fts_ai AFTER INSERT ON products BEGIN
+        INSERT INTO products_fts(rowid, name, description, barcode)
+        VALUES (new.id, new.name, new.description, new.barcode);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS products_fts_ad AFTER DELETE ON products BEGIN
+        INSERT INTO products_fts(products_fts, rowid, name, description, barcode)
+        VALUES ('delete', old.id, old.name, old.description, old.barcode);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS products_fts_au AFTER UPDATE OF name, description, barcode ON products BEGIN
+        INSERT INTO products_fts(products_fts, rowid, name, description, barcode)
+        VALUES ('delete', old.id, old.name, old.description, old.barcode);
+        INSERT INTO products_fts(rowid, name, description, barcode)
+        VALUES (new.id, new.name, new.description, new.barcode);
+    END
+    """,
+]
+
+_POSTGRESQL_DDL = [
+    "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+    "CREATE EXTENSION IF NOT EXISTS unaccent",
+    # unaccent() no es IMMUTABLE; este envoltorio permite usarlo en un índice
+    """
+    CREATE OR REPLACE FUNCTION products_search_text(name text, description text, barcode text)
+    RETURNS text AS $$
+        SELECT lower(public.unaccent('public.unaccent'::regdictionary,
+            coalesce(name, '') || ' ' || coalesce(description, '') || ' ' || coalesce(barcode, '')))
+    $$ LANGUAGE sql IMMUTABLE PARALLEL SAFE
+    """,
+    """
+    CREATE INDEX IF NOT EXISTS ix_products_search_trgm ON products
+    USING gin (products_search_text(name, description, barcode) gin_trgm_ops)
+    """,
+]
+
+# Pesos bm25 por columna (name, description, barcode)
+_FTS_WEIGHTS = "10.0, 1.0, 5.0"
+
+
+def create_search_index(connection):
+    """Crea el índice de búsqueda del motor en uso (idempotente; lo llama la migración 0004)"""
+    dialect = connection.dialect.name
+    try:
+        # En un savepoint: si el motor no lo soporta la migración sigue y se usa LIKE
+        with connection.begin_nested():
+            if dialect == "sqlite":
+                exists = connection.execute(text(
+                    "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'products_fts'"
+                )).first()
+                if not exists:
+                    connection.execute(text(_SQLITE_DDL[0]))
+                    connection.execute(text("INSERT INTO products_fts(products_fts) VALUES ('rebuild')"))
+                for ddl in _SQLITE_DDL[1:]:
+                    connection.execute(text(ddl))
+            elif dialect == "postgresql":
+                for ddl in _POSTGRESQL_DDL:
+                    connection.execute(text(ddl))
+    except SQLAlchemyError:
+        logger.exception("No se pudo crear el índice de búsqueda; se usará LIKE")
+
+
+def drop_search_index(connection):
+    if connection.dialect.name == "sqlite":
+        for trigger in ("products_fts_ai", "products_fts_ad", "products_fts_au"):
+            connection.execute(text(f"DROP TRIGGER IF EXISTS {trigger}"))
+        connection.execute(text("DROP TABLE IF EXISTS products_fts"))
+    elif connection.dialect.name == "postgresql":
+        connection.execute(text("DROP INDEX IF EXISTS ix_products_search_trgm"))
+        connection.execute(text("DROP FUNCTION IF EXISTS products_search_text(text, text, text)"))
+
+
+def detect_backend(connection):
+    """Activa el backend según el índice que exista en la BD (una consulta, al arrancar)"""
+    global _backend
+    dialect = connection.dialect.name
+    if dialect == "sqlite":
+        found = connection.execute(text(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'products_fts'"
+        )).first()
+        _backend = "sqlite_fts5" if found else "like"
+    elif dialect == "postgresql":
+        found = connection.execute(text(
+            "SELECT 1 FROM pg_indexes WHERE indexname = 'ix_products_search_trgm'"
+        )).first()
+        _backend = "postgresql_trgm" if found else "like"
+    else:
+        _backend = "like"
+    return _backend
+
+
+def normalize(term: str) -> str:
+    """Minúsculas y sin tildes, para comparar sin importar acentos"""
+    decomposed = unicodedata.normalize("NFKD", term.lower())
+    return "".join(ch for ch in decomposed if not unicodedata.combining(ch))
+
+
+def tokenize(term: str):
+    return re.findall(r"[^\W_]+", normalize(term or ""))
+
+
+def apply_search(query, term: str):
+    """
+    Filtra la consulta de productos por el término de búsqueda.
+    Devuelve (query, rank): rank es la expresión de relevancia, ordenada de forma
+    ascendente (menor es mejor), o None si el término no tiene palabras.
+    """
+    words = tokenize(term)
+    if not words:
+        return query, None
+
+    if _backend == "sqlite_fts5":
+        # Cada palabra como prefijo para búsqueda mientras se escribe
+        match = " ".join(f'"{w}"*' for w in words)
+        matches = text(
+            f"SELECT rowid AS product_id, bm25(products_fts, {_FTS_WEIGHTS}) AS score "
+            "FROM products_fts WHERE products_fts MATCH :match"
+        ).bindparams(match=match).columns(
+            column("product_id", Integer), column("score", Float)
+        ).subquery("search_matches")
+        query = query.join(matches, matches.c.product_id == Product.id)
+        return query, matches.c.score
+
+    if _backend == "postgresql_trgm":
+        search_text = func.products_search_text(Product.name, Product.description, Product.barcode)
+        query = query.filter(and_(*[search_text.like(f"%{w}%") for w in words]))
+        return query, -func.word_similarity(" ".join(words), search_text)
+
+    # Respaldo genérico: LIKE sobre nombre, descripción y código de barras. Las columnas
+    # conservan sus tildes: cada palabra se busca tal como se escribió y también sin tildes
+    for word in re.findall(r"[^\W_]+", term.lower()):
+        patterns = dict.fromkeys([f"%{word}%", f"%{normalize(word)}%"])
+        query = query.filter(or_(*[
+            column.ilike(pattern)
+            for pattern in patterns
+            for column in (Product.name, Product.description, Product.barcode)
+        ]))
+    return query, func.length(Product.name)
@@ -0,0 +1,128 @@
+import hashlib
+import io
+import logging
+import os
+import re
+import tempfile
+from typing import Optional
+from config import IMAGE_STORAGE_DIR, IMAGE_VARIANTS, IMAGE_VARIANT_QUALITY
+
+try:
+    from PIL import Image, ImageOps
+except ImportError:  # Pillow es opcional: sin él solo se sirve la imagen original
+    Image = None
+
+logger = logging.getLogger(__name__)
+
+_HASH_RE = re.compile(r"^[0-9a-f]{64}$")
+# Caracteres del hash que van en la URL versionada de la imagen
+_VERSION_LENGTH = 16
+
+# Firmas de los formatos de imagen más comunes
+_MAGIC_NUMBERS = [
+    (b"\xff\xd8\xff", "image/jpeg"),
+    (b"\x89PNG\r\n\x1a\n", "image/png"),
+    (b"GIF87a", "image/gif"),
+    (b"GIF89a", "image/gif"),
+]
+
+
+def _blob_path(image_hash: str) -> str:
+    return os.path.join(IMAGE_STORAGE_DIR, image_hash[:2], image_hash)
+
+
+def _variant_path(image_hash: str, variant: str) -> str:
+    return os.path.join(IMAGE_STORAGE_DIR, "variants", variant, image_hash[:2], image_hash)
+
+
+def _write_atomic(path: str, data: bytes):
+    directory = os.path.dirname(path)
+    os.makedirs(directory, exist_ok=True)
+
+    # Escritura atómica: nunca se sirve un archivo a medio escribir
+    fd, tmp_path = tempfile.mkstemp(dir=directory)
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def save_image(data: bytes) -> str:
+    """Guarda la imagen una sola vez, indexada por su hash SHA-256, y devuelve el hash"""
+    image_hash = hashlib.sha256(data).hexdigest()
+    path = _blob_path(image_hash)
+    if not os.path.exists(path):
+        _write_atomic(path, data)
+    return image_hash
+
+
+def get_image_path(image_hash: str) -> Optional[str]:
+    """Ruta del archivo de la imagen, o None si no existe en el almacén"""
+    if not image_hash or not _HASH_RE.match(image_hash):
+        return None
+    path = _blob_path(image_hash)
+    return path if os.path.exists(path) else None
+
+
+def get_variant_path(image_hash: str, variant: str) -> Optional[str]:
+    """Ruta de una variante redimensionada, o None si aún no se ha generado"""
+    if variant not in IMAGE_VARIANTS or not image_hash or not _HASH_RE.match(image_hash):
+        return None
+    path = _variant_path(image_hash, variant)
+    return path if os.path.exists(path) else None
+
+
+def generate_variants(image_hash: str):
+    """Genera las variantes JPEG configuradas en IMAGE_VARIANTS (pensado para BackgroundTasks)"""
+    source = get_image_path(image_hash)
+    if Image is None or source is None:
+        return
+
+    try:
+        with Image.open(source) as original:
+            original = ImageOps.exif_transpose(original)
+            if original.mode not in ("RGB", "L"):
+                # Aplanar transparencias sobre fondo blanco
+                background = Image.new("RGB", original.size, "white")
+                rgba = original.convert("RGBA")
+                background.paste(rgba, mask=rgba.getchannel("A"))
+                original = background
+
+            for variant, size in IMAGE_VARIANTS.items():
+                path = _variant_path(image_hash, variant)
+                if os.path.exists(path):
+                    continue
+                resized = original.copy()
+                resized.thumbnail((size, size), Image.LANCZOS)
+                buffer = io.BytesIO()
+                resized.save(buffer, "JPEG", quality=IMAGE_VARIANT_QUALITY, optimize=True)
+                _write_atomic(path, buffer.getvalue())
+    except Exception:
+        logger.exception("No se pudieron generar las variantes de la imagen %s", image_hash)
+
+
+def image_version(image_hash: str) -> str:
+    """Versión (?v=) de la URL de la imagen: prefijo del hash"""
+    return image_hash[:_VERSION_LENGTH]
+
+
+def image_url(product_id: int, image_hash: Optional[str]) -> Optional[str]:
+    """URL pública de la imagen; la versión permite cachearla de forma indefinida"""
+    if not image_hash:
+        return None
+    return f"/products/{product_id}/image?v={image_version(image_hash)}"
+
+
+def guess_media_type(path: str) -> str:
+    with open(path, "rb") as f:
+        header = f.read(12)
+    for magic, media_type in _MAGIC_NUMBERS:
+        if header.startswith(magic):
+            return media_type
+    if header[:4] == b"RIFF" and header[8:12] == b"WEBP":
+        return "image/webp"
+    return "application/octet-stream"
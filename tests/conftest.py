@@ -0,0 +1,61 @@
+# Pruebas contra una base SQLite temporal con el esquema de las migraciones.
+# Las variables de entorno se fijan antes de importar la aplicación (config las lee al importar).
+
+import os
+import tempfile
+
+_TMP_DIR = tempfile.mkdtemp(prefix="paws_tests_")
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(_TMP_DIR, 'test.db')}"
+os.environ.pop("ASYNC_DATABASE_URL", None)
+os.environ.pop("CACHE_URL", None)
+os.environ["IMAGE_STORAGE_DIR"] = os.path.join(_TMP_DIR, "media")
+os.environ["BCRYPT_ROUNDS"] = "4"
+
+import itertools
+
+import pytest
+from fastapi.testclient import TestClient
+
+import migrate
+
+migrate.upgrade(configure_logging=False)
+
+import main  # noqa: E402  (después de crear el esquema: el lifespan lo verifica)
+
+_names = itertools.count(1)
+
+
+@pytest.fixture(scope="session")
+def client():
+    # Con el lifespan activo todas las peticiones comparten el mismo event loop,
+    # como en un worker de uvicorn
+    with TestClient(main.app) as test_client:
+        yield test_client
+
+
+@pytest.fixture(scope="session")
+def auth_headers(client):
+    user = {"email": "admin@test.com", "username": "admin", "password": "secret",
+            "full_name": "Admin", "role": "admin"}
+    assert client.post("/auth/register", json=user).status_code == 201
+    response = client.post("/auth/login", json={"username": "admin", "password": "secret"})
+    assert response.status_code == 200
+    return {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+
+@pytest.fixture(scope="session")
+def category(client, auth_headers):
+    response = client.post("/categories/", json={"name": "Alimento"}, headers=auth_headers)
+    assert response.status_code == 201
+    return response.json()
+
+
+@pytest.fixture(scope="session")
+def make_product(client, auth_headers, category):
+    def _make_product(stock=10, price=10):
+        data = {"name": f"Producto {next(_names)}", "price": str(price), "stock": str(stock),
+                "category_id": str(category["id"])}
+        response = client.post("/products/", data=data, headers=auth_headers)
+        assert response.status_code == 201
+        return response.json()
+    return _make_product
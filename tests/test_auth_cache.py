@@ -0,0 +1,40 @@
+from auth import user_cache
+from database import SessionLocal
+from models.user import User
+
+
+def _login(client, username):
+    user = {"email": f"{username}@test.com", "username": username, "password": "secret",
+            "full_name": username.title(), "role": "cashier"}
+    assert client.post("/auth/register", json=user).status_code == 201
+    response = client.post("/auth/login", json={"username": username, "password": "secret"})
+    headers = {"Authorization": f"Bearer {response.json()['access_token']}"}
+    # La primera petición autenticada deja el usuario en la caché
+    assert client.get("/users/me", headers=headers).status_code == 200
+    assert user_cache.get(username) is not None
+    return headers
+
+
+def test_user_cache_is_evicted_after_commit(client):
+    headers = _login(client, "cajero_commit")
+
+    with SessionLocal() as db:
+        db.query(User).filter(User.username == "cajero_commit").one().is_active = False
+        db.flush()
+        # Hasta el commit la fila guardada sigue siendo la vigente para las demás conexiones
+        assert user_cache.get("cajero_commit") is not None
+        db.commit()
+        assert user_cache.get("cajero_commit") is None
+
+    assert client.get("/users/me", headers=headers).status_code == 400
+
+
+def test_user_cache_is_kept_after_rollback(client):
+    headers = _login(client, "cajero_rollback")
+
+    with SessionLocal() as db:
+        db.query(User).filter(User.username == "cajero_rollback").one().is_active = False
+        db.flush()
+        db.rollback()
+    assert user_cache.get("cajero_rollback") is not None
+    assert client.get("/users/me", headers=headers).status_code == 200
@@ -0,0 +1,23 @@
+import pytest
+
+
+@pytest.mark.parametrize("path", ["/products/", "/sales/"])
+def test_single_vary_header(client, auth_headers, path):
+    # revision_etag y formats.response agregan Vary: Accept; la respuesta lleva una sola cabecera
+    response = client.get(path, headers=auth_headers)
+    assert response.status_code == 200
+    assert response.headers.get_list("vary") == ["Accept"]
+
+
+def test_get_sale_returns_json(client, auth_headers, make_product):
+    product = make_product(stock=5)
+    sale = {"payment_method": "cash", "items": [{"product_id": product["id"], "quantity": 2, "price": 10}]}
+    created = client.post("/sales/", json=sale, headers=auth_headers)
+    assert created.status_code == 201
+
+    response = client.get(f"/sales/{created.json()['id']}", headers=auth_headers)
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/json"
+    body = response.json()
+    assert body["items"][0]["product_name"] == product["name"]
+    assert body["user"]["username"] == "admin"
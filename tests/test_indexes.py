@@ -0,0 +1,42 @@
+from datetime import datetime
+
+import pytest
+from sqlalchemy import case, func, select, text
+
+from database import engine
+from models.product import Product
+from models.sale import Sale, SaleItem
+
+# Consultas de las rutas calientes (mismas condiciones y orden que en los routers)
+QUERIES = {
+    # GET /sales: más recientes primero, con y sin rango de fechas
+    "ix_sales_created_at_desc": [
+        select(Sale).order_by(Sale.created_at.desc()).limit(100),
+        select(Sale).where(Sale.created_at >= datetime(2026, 1, 5), Sale.created_at <= datetime(2026, 1, 6))
+        .order_by(Sale.created_at.desc()).limit(100),
+    ],
+    # Items de cada página de ventas (selectinload)
+    "ix_sale_items_sale_id": [
+        select(SaleItem).where(SaleItem.sale_id.in_([1, 2, 3])),
+    ],
+    # GET /dashboard/stats: productos activos y con stock bajo
+    "ix_products_active_stock": [
+        select(func.count(Product.id), func.coalesce(func.sum(case((Product.stock < 10, 1), else_=0)), 0))
+        .where(Product.is_active == True),  # noqa: E712
+    ],
+}
+
+
+def _query_plan(statement) -> str:
+    sql = str(statement.compile(engine, compile_kwargs={"literal_binds": True}))
+    with engine.connect() as connection:
+        return "\n".join(row[-1] for row in connection.execute(text("EXPLAIN QUERY PLAN " + sql)))
+
+
+@pytest.mark.skipif(engine.dialect.name != "sqlite", reason="planes de EXPLAIN QUERY PLAN de SQLite")
+@pytest.mark.parametrize("index_name, statement", [
+    (index_name, statement) for index_name, statements in QUERIES.items() for statement in statements
+])
+def test_hot_queries_use_index(index_name, statement):
+    plan = _query_plan(statement)
+    assert index_name in plan, plan
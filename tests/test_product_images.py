@@ -0,0 +1,28 @@
+import pytest
+
+PNG = b"\x89PNG\r\n\x1a\n" + b"\x00" * 32
+
+
+@pytest.fixture(scope="module")
+def product_with_image(client, auth_headers, category):
+    data = {"name": "Producto con imagen", "price": "10", "stock": "1", "category_id": str(category["id"])}
+    response = client.post("/products/", data=data, files={"image": ("foto.png", PNG, "image/png")},
+                           headers=auth_headers)
+    assert response.status_code == 201
+    return response.json()
+
+
+def test_versioned_url_is_immutable(client, product_with_image):
+    response = client.get(product_with_image["image_url"])
+    assert response.status_code == 200
+    assert response.content == PNG
+    assert "immutable" in response.headers["cache-control"]
+
+
+def test_other_versions_are_not_cached(client, product_with_image):
+    image_hash = product_with_image["image_hash"]
+    # Solo la versión que genera image_url se cachea como definitiva
+    for version in (image_hash[:1], image_hash[:8], image_hash, "otra"):
+        response = client.get(f"/products/{product_with_image['id']}/image", params={"v": version})
+        assert response.status_code == 200
+        assert response.headers["cache-control"] == "no-cache", version
@@ -0,0 +1,27 @@
+import pytest
+
+from utils import encode_cursor
+
+
+@pytest.mark.parametrize("values", [[{"a": 1}, 2], [["x"], 2], ["x"]])
+def test_invalid_cursor_is_rejected(client, auth_headers, values):
+    # order_by=name pagina por (name, id): cursores con otros valores o largo se rechazan con 400
+    response = client.get("/products/", params={"cursor": encode_cursor(values)}, headers=auth_headers)
+    assert response.status_code == 400
+
+
+def test_malformed_cursor_is_rejected(client, auth_headers):
+    response = client.get("/products/", params={"cursor": "no-es-un-cursor!"}, headers=auth_headers)
+    assert response.status_code == 400
+
+
+def test_next_cursor_continues_the_listing(client, auth_headers, make_product):
+    for _ in range(3):
+        make_product()
+    first = client.get("/products/", params={"limit": 2}, headers=auth_headers)
+    assert first.status_code == 200
+    second = client.get("/products/", params={"limit": 2, "cursor": first.headers["x-next-cursor"]},
+                        headers=auth_headers)
+    assert second.status_code == 200
+    first_ids = {product["id"] for product in first.json()}
+    assert second.json() and not first_ids & {product["id"] for product in second.json()}
@@ -0,0 +1,37 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from sqlalchemy import func, select
+
+from database import SessionLocal
+from models.sale import SaleItem
+
+
+@pytest.mark.parametrize("quantity, expected_sales, expected_stock", [(1, 10, 0), (3, 3, 1)])
+def test_parallel_sales_never_oversell(client, auth_headers, make_product, quantity, expected_sales, expected_stock):
+    product = make_product(stock=10)
+    sale = {"payment_method": "cash",
+            "items": [{"product_id": product["id"], "quantity": quantity, "price": 10}]}
+
+    def sell(_):
+        return client.post("/sales/", json=sale, headers=auth_headers).status_code
+
+    with ThreadPoolExecutor(max_workers=25) as executor:
+        statuses = list(executor.map(sell, range(25)))
+
+    assert statuses.count(201) == expected_sales
+    # El resto se rechaza por falta de stock, nunca con un error del servidor
+    assert all(status in (400, 409) for status in statuses if status != 201)
+
+    stock = client.get(f"/products/{product['id']}", headers=auth_headers).json()["stock"]
+    assert stock == expected_stock
+    with SessionLocal() as db:
+        sold = db.execute(
+            select(func.coalesce(func.sum(SaleItem.quantity), 0)).where(SaleItem.product_id == product["id"])
+        ).scalar_one()
+    assert sold == expected_sales * quantity == 10 - expected_stock
+
+
+def test_sale_without_items_is_rejected(client, auth_headers):
+    response = client.post("/sales/", json={"payment_method": "cash", "items": []}, headers=auth_headers)
+    assert response.status_code == 422
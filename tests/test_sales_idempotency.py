@@ -0,0 +1,33 @@
+import pytest
+from sqlalchemy.exc import IntegrityError
+
+from routers import sales as sales_router
+
+
+def _sale(product):
+    return {"payment_method": "cash", "items": [{"product_id": product["id"], "quantity": 1, "price": 10}]}
+
+
+def test_retry_with_same_key_returns_original_sale(client, auth_headers, make_product):
+    product = make_product(stock=5)
+    headers = {**auth_headers, "Idempotency-Key": "venta-reintento-1"}
+
+    first = client.post("/sales/", json=_sale(product), headers=headers)
+    retry = client.post("/sales/", json=_sale(product), headers=headers)
+
+    assert (first.status_code, retry.status_code) == (201, 200)
+    assert retry.json()["id"] == first.json()["id"]
+    assert client.get(f"/products/{product['id']}", headers=auth_headers).json()["stock"] == 4
+
+
+def test_integrity_error_without_key_is_not_a_retry(client, auth_headers, make_product, monkeypatch):
+    product = make_product(stock=5)
+    # Hay ventas sin clave (client_sale_id NULL) que no deben devolverse como "la original"
+    assert client.post("/sales/", json=_sale(product), headers=auth_headers).status_code == 201
+
+    def failing_register_sale(*args, **kwargs):
+        raise IntegrityError("INSERT INTO sale_items", {}, Exception("FOREIGN KEY constraint failed"))
+
+    monkeypatch.setattr(sales_router, "_register_sale", failing_register_sale)
+    with pytest.raises(IntegrityError):
+        client.post("/sales/", json=_sale(product), headers=auth_headers)
@@ -0,0 +1,67 @@
+import re
+from contextlib import contextmanager
+
+import pytest
+from sqlalchemy import event
+
+from database import async_engine, engine
+
+
+@contextmanager
+def count_statements(target=async_engine.sync_engine):
+    """SQL ejecutado en el engine (por defecto el async de las lecturas)"""
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(target, "before_cursor_execute", before_cursor_execute)
+    try:
+        yield statements
+    finally:
+        event.remove(target, "before_cursor_execute", before_cursor_execute)
+
+
+@pytest.fixture(scope="module")
+def recorded_sales(client, auth_headers, make_product):
+    products = [make_product(stock=1000) for _ in range(3)]
+    for index in range(25):
+        items = [{"product_id": product["id"], "quantity": 1, "price": 10} for product in products[: index % 3 + 1]]
+        response = client.post("/sales/", json={"payment_method": "cash", "items": items}, headers=auth_headers)
+        assert response.status_code == 201
+
+
+@pytest.mark.parametrize("limit", [1, 5, 25])
+def test_sales_page_uses_fixed_number_of_statements(client, auth_headers, recorded_sales, limit):
+    # Primera petición fuera del conteo: deja en caché el usuario autenticado
+    client.get("/sales/?limit=1", headers=auth_headers)
+
+    with count_statements() as statements:
+        response = client.get(f"/sales/?limit={limit}", headers=auth_headers)
+
+    assert response.status_code == 200
+    assert len(response.json()) == limit
+    # Ventas con su cajero (JOIN) + items con el nombre del producto (selectin): sin N+1
+    assert len(statements) == 2, statements
+    # Del producto solo se leen id y nombre: ni la imagen legada ni la descripción
+    selected_columns = statements[1].split("FROM")[0]
+    product_columns = set(re.findall(r"\bproducts(?:_\d+)?\.(\w+)", selected_columns))
+    assert product_columns == {"id", "name"}, statements[1]
+    for statement in statements:
+        assert "image_base64" not in statement and "description" not in statement
+
+
+def test_sales_batch_does_not_reload_sales_after_commit(client, auth_headers, make_product):
+    product = make_product(stock=100)
+    batch = {"sales": [
+        {"payment_method": "cash", "items": [{"product_id": product["id"], "quantity": 1, "price": 10}]}
+        for _ in range(10)
+    ]}
+
+    with count_statements(engine) as statements:
+        response = client.post("/sales/batch", json=batch, headers=auth_headers)
+
+    assert response.status_code == 200
+    assert response.json()["created"] == 10
+    # Los eventos se arman antes del commit: ninguna venta se vuelve a leer por id
+    assert not [statement for statement in statements if "WHERE sales.id = ?" in statement]
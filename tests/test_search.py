@@ -0,0 +1,29 @@
+import pytest
+
+import search
+from cache import product_list_cache
+
+
+@pytest.fixture(scope="module")
+def salmon(client, auth_headers, category):
+    data = {"name": "Salmón cachorro 2kg", "price": "10", "stock": "5", "category_id": str(category["id"])}
+    response = client.post("/products/", data=data, headers=auth_headers)
+    assert response.status_code == 201
+    return response.json()
+
+
+@pytest.mark.parametrize("backend, term", [
+    ("sqlite_fts5", "salmón"),
+    ("sqlite_fts5", "salmon"),
+    ("sqlite_fts5", "SALMÓN cach"),
+    ("like", "salmón"),
+    ("like", "Salmón cach"),
+    ("like", "cachorro"),
+])
+def test_search_finds_accented_names(client, auth_headers, salmon, monkeypatch, backend, term):
+    monkeypatch.setattr(search, "_backend", backend)
+    # La caché del listado no distingue el backend: cada caso consulta la BD
+    client.portal.call(product_list_cache.invalidate)
+    response = client.get("/products/", params={"search": term}, headers=auth_headers)
+    assert response.status_code == 200
+    assert salmon["id"] in [product["id"] for product in response.json()]
@@ -0,0 +1,34 @@
+from sqlalchemy import select, update
+
+from database import SessionLocal
+from models.product import Product
+
+
+def _stock(product_id):
+    with SessionLocal() as db:
+        return db.execute(select(Product.stock).where(Product.id == product_id)).scalar_one()
+
+
+def test_outer_rollback_discards_released_savepoints(make_product):
+    product = make_product(stock=10)
+
+    with SessionLocal() as db:
+        # Una lectura antes del SAVEPOINT, como en POST /sales/batch
+        assert db.execute(select(Product.stock).where(Product.id == product["id"])).scalar_one() == 10
+        with db.begin_nested():
+            db.execute(update(Product).where(Product.id == product["id"]).values(stock=3))
+        db.rollback()
+
+    assert _stock(product["id"]) == 10
+
+
+def test_outer_commit_keeps_released_savepoints(make_product):
+    product = make_product(stock=10)
+
+    with SessionLocal() as db:
+        db.execute(select(Product.stock).where(Product.id == product["id"])).scalar_one()
+        with db.begin_nested():
+            db.execute(update(Product).where(Product.id == product["id"]).values(stock=3))
+        db.commit()
+
+    assert _stock(product["id"]) == 3
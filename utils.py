@@ -1,6 +1,27 @@
+import base64
+import json
 from datetime import datetime
 from config import TIMEZONE
 
 def get_local_now():
     """Obtiene la fecha y hora actual en la zona horaria de Colombia"""
-    return datetime.now(TIMEZONE)
\ No newline at end of file
+    return datetime.now(TIMEZONE)
+
+def encode_cursor(values):
+    """Codifica los valores de la última fila de una página como cursor opaco"""
+    raw = json.dumps(list(values), separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+def decode_cursor(cursor: str):
+    """Decodifica un cursor generado por encode_cursor; lanza ValueError si es inválido"""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+    except Exception as exc:
+        raise ValueError("Invalid cursor") from exc
+    if not isinstance(values, list):
+        raise ValueError("Invalid cursor")
+    # Solo valores escalares: son los de las columnas de orden
+    if not all(value is None or isinstance(value, (str, int, float)) for value in values):
+        raise ValueError("Invalid cursor")
+    return values